@@ -0,0 +1,99 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+import numpy as np
+
+from lab1_cg106_g18_v3_Melnyk_Zacharneva import search, SearchInterrupted, h2
+
+
+class QueryResult(NamedTuple):
+    index: int  # position of the query in the input list
+    start: tuple
+    goal: tuple
+    num_steps: int  # -1 if there is no path or the query was interrupted
+    path: list
+    status: str  # "ok", "unreachable", "timeout" or "max_expansions"
+
+
+# worker side
+_maze = None  # the shared maze as a NumPy view, set once per worker by `_attach`
+_shm = None
+
+
+def _attach(name, shape):
+    """Pool initializer: map the maze from shared memory instead of receiving a pickled copy."""
+    global _maze, _shm
+    _shm = shared_memory.SharedMemory(name=name)
+    _maze = np.ndarray(shape, dtype=np.uint8, buffer=_shm.buf)
+
+
+def _solve(index, start, goal, H, timeout, max_expansions):
+    deadline = time.perf_counter() + timeout if timeout is not None else None
+    try:
+        num_steps, path, _ = search(_maze, start, goal, H, max_expansions=max_expansions, deadline=deadline)
+    except SearchInterrupted:
+        status = "timeout" if deadline is not None and time.perf_counter() > deadline else "max_expansions"
+        return QueryResult(index, start, goal, -1, [], status)
+    return QueryResult(index, start, goal, num_steps, path, "ok" if num_steps != -1 else "unreachable")
+
+
+# client side
+def batch_astar(maze, queries, H=h2, workers=None, ordered=True, timeout=None, max_expansions=None):
+    """
+    Answer many (start, goal) queries on one maze with a process pool.
+
+    The maze is copied into shared memory once; every worker maps it when it starts.
+    Results are yielded as soon as they are ready.
+
+    Parameters:
+    - maze: nested list or 2D NumPy array, 0 - empty space, 1 - wall
+    - queries: list of (start, goal) tuples
+    - H: heuristic, must be a module level function so it can be sent to the workers
+    - workers: number of processes, `os.cpu_count()` by default
+    - ordered: yield results in input order; if False, in completion order
+    - timeout: seconds a single query may search for
+    - max_expansions: expansions a single query may use
+
+    Yields:
+    - `QueryResult` for every query
+    """
+
+    grid = np.ascontiguousarray(maze, dtype=np.uint8)
+    shm = shared_memory.SharedMemory(create=True, size=max(grid.nbytes, 1))
+    try:
+        np.ndarray(grid.shape, dtype=np.uint8, buffer=shm.buf)[:] = grid
+
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_attach,
+                                 initargs=(shm.name, grid.shape)) as pool:
+            futures = [pool.submit(_solve, i, tuple(start), tuple(goal), H, timeout, max_expansions)
+                       for i, (start, goal) in enumerate(queries)]
+            for future in (futures if ordered else as_completed(futures)):
+                yield future.result()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+if __name__ == "__main__":
+    import random
+    from benchmark import open_maze
+
+    size, n = 512, 2000
+    maze = open_maze(size)
+    rng = random.Random(18)
+    cells = [(x, y) for x in range(size) for y in range(size) if maze[x][y] == 0]
+    queries = [(rng.choice(cells), rng.choice(cells)) for _ in range(n)]
+
+    t = time.perf_counter()
+    for start, goal in queries[:100]:
+        search(maze, start, goal, h2)
+    print(f"serial:   {100 / (time.perf_counter() - t):8.1f} queries/s")
+
+    t = time.perf_counter()
+    statuses = {}
+    for result in batch_astar(maze, queries, ordered=False, timeout=5):
+        statuses[result.status] = statuses.get(result.status, 0) + 1
+    print(f"parallel: {n / (time.perf_counter() - t):8.1f} queries/s, {statuses}")
@@ -0,0 +1,174 @@
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from lab1_cg106_g18_v3_Melnyk_Zacharneva import astar, h1, h2, h3
+from landmarks import Landmarks
+from hpa import HPA
+
+
+# maze generators
+def open_maze(size, fill=0.1, seed=18):
+    """Open grid with `fill` share of randomly placed walls."""
+    rng = random.Random(seed)
+    maze = [[int(rng.random() < fill) for _ in range(size)] for _ in range(size)]
+    maze[0][0] = maze[size - 1][size - 1] = 0
+    return maze
+
+
+def backtracker_maze(size, seed=18):
+    """Perfect maze carved by an (iterative) recursive backtracker: corridors on even cells, walls in between."""
+    rng = random.Random(seed)
+    maze = [[1] * size for _ in range(size)]
+    maze[0][0] = 0
+    stack = [(0, 0)]
+    while stack:
+        x, y = stack[-1]
+        neighbours = [(x + dx, y + dy, dx, dy) for dx, dy in [(0, 2), (2, 0), (0, -2), (-2, 0)]
+                      if 0 <= x + dx < size and 0 <= y + dy < size and maze[x + dx][y + dy] == 1]
+        if not neighbours:
+            stack.pop()
+            continue
+        nx, ny, dx, dy = rng.choice(neighbours)
+        maze[x + dx // 2][y + dy // 2] = maze[nx][ny] = 0
+        stack.append((nx, ny))
+    maze[size - 1][size - 1] = 0
+    if size % 2 == 0:  # the last row/column is not carved for even sizes, open a way in
+        maze[size - 2][size - 1] = 0
+    return maze
+
+
+def room_maze(size, room=8, seed=18):
+    """Open rooms of `room` x `room` cells separated by one-cell walls, every wall segment has one door."""
+    rng = random.Random(seed)
+    maze = [[0] * size for _ in range(size)]
+    for line in range(room, size - 1, room + 1):
+        for i in range(size):
+            maze[line][i] = maze[i][line] = 1
+        for lo in range(0, size, room + 1):  # a door in every segment between two crossings
+            hi = min(lo + room, size)
+            maze[line][rng.randrange(lo, hi)] = 0
+            maze[rng.randrange(lo, hi)][line] = 0
+    maze[0][0] = maze[size - 1][size - 1] = 0
+    return maze
+
+
+MAZES = {"random-fill": open_maze, "backtracker": backtracker_maze, "open-room": room_maze}
+
+
+# algorithms: a factory gets the maze, does any preprocessing and returns a function (start, goal) -> `astar` result
+def plain(mode, H):
+    return lambda maze: lambda start, goal: astar(maze, start, goal, H, mode)
+
+
+def alt(maze):
+    H = Landmarks.build(maze, cache_dir=None)  # not cached, so the build time is measured every run
+    return lambda start, goal: astar(maze, start, goal, H)
+
+
+def hpa(maze):
+    return HPA(maze, cluster=32).find_path  # `expanded` counts abstract nodes
+
+
+ALGOS = {
+    "astar-h1": plain("astar", h1),
+    "astar-h2": plain("astar", h2),
+    "astar-h3": plain("astar", h3),
+    "jps-h2": plain("jps", h2),
+    "bidirectional-h2": plain("bidirectional", h2),
+    "dial-h2": plain("dial", h2),
+    "astar-alt": alt,
+    "hpa": hpa,
+}
+METRICS = ["time", "build_time", "expanded", "peak_memory"]  # compared against the baseline, lower is better
+
+
+def run(maze, algo, repeat=1, memory=True):
+    """
+    One benchmark record: preprocessing time, best query time of `repeat` runs, nodes expanded, peak traced
+    memory of a query and path length.
+    """
+    goal = (len(maze) - 1, len(maze) - 1)
+    t = time.perf_counter()
+    query = ALGOS[algo](maze)
+    build = time.perf_counter() - t
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        num_steps, (path, visited) = query((0, 0), goal)
+        best = min(best, time.perf_counter() - t)
+
+    peak = None
+    if memory:  # separate run, tracing allocations slows the search down
+        tracemalloc.start()
+        query((0, 0), goal)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {"time": best, "build_time": build, "expanded": len(visited), "peak_memory": peak,
+            "path_length": num_steps}
+
+
+def compare(results, baseline, threshold, min_time=0.01):
+    """
+    Regressions of `results` against `baseline`: metrics more than `threshold` percent worse and changed
+    path lengths. Times below `min_time` seconds are too noisy to compare and are skipped.
+    """
+    regressions = []
+    for key, record in results.items():
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        if record["path_length"] != old["path_length"]:
+            regressions.append(f"{key}: path length {old['path_length']} -> {record['path_length']}")
+        for metric in METRICS:
+            if record.get(metric) is None or not old.get(metric):
+                continue
+            if metric.endswith("time") and max(record[metric], old[metric]) < min_time:
+                continue
+            change = (record[metric] - old[metric]) / old[metric] * 100
+            if change > threshold:
+                regressions.append(f"{key}: {metric} {old[metric]:.4g} -> {record[metric]:.4g} (+{change:.1f}%)")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="lab1 pathfinding benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[30, 128, 512, 1024, 4096])
+    parser.add_argument("--mazes", nargs="+", default=list(MAZES), choices=list(MAZES))
+    parser.add_argument("--algos", nargs="+", default=list(ALGOS), choices=list(ALGOS))
+    parser.add_argument("--seed", type=int, default=18)
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case, the best time is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the (slow) peak memory run")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression, percent")
+    parser.add_argument("--min-time", type=float, default=0.01, help="shorter times are not compared, seconds")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        for kind in args.mazes:
+            maze = np.array(MAZES[kind](size, seed=args.seed), dtype=np.uint8)
+            for algo in args.algos:
+                key = f"{kind}-{size}-{algo}"
+                results[key] = run(maze, algo, args.repeat, not args.no_memory)
+                r = results[key]
+                memory = f"{r['peak_memory'] / 2 ** 20:8.1f} MiB" if r["peak_memory"] is not None else ""
+                print(f"{key:>36}: steps {r['path_length']:>7}, expanded {r['expanded']:>9}, "
+                      f"time {r['time']:8.3f}s (build {r['build_time']:7.3f}s) {memory}")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_time)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,218 @@
+import numpy as np
+
+from lab1_cg106_g18_v3_Melnyk_Zacharneva import astar, h1
+
+
+class Components:
+    """
+    Connected-component index of the free cells of a maze.
+
+    Built with a vectorised union-find (hooking and pointer jumping over all free neighbour pairs at once),
+    which leaves every free cell holding the label of its component; the index keeps these flat labels and
+    the size of every component up to date cell by cell. A freed cell relabels the smaller components around
+    it into the largest one. A new wall probes from its free neighbours in lockstep: probes that meet belong
+    to one component, so when the wall splits nothing, the work stays around the wall; when it does, only the
+    pieces whose probes ran out first are relabelled and the largest piece keeps its label.
+    With it, queries to goals that cannot be reached return -1 at once instead of expanding every reachable
+    cell first.
+
+    Example:
+        index = Components(maze)
+        num_steps, viz = index.astar((0, 0), (0, 6), h2)  # -1 with nothing expanded if (0, 6) is cut off
+        index.set_cell(4, 2, 1)  # a door closes
+    """
+
+    def __init__(self, maze) -> None:
+        self.grid = np.array(maze, dtype=np.uint8)  # own copy, edited by `set_cell`
+        self.rows, self.cols = self.grid.shape
+        self.labels = label(self.grid).reshape(-1)  # walls keep their own index
+        counts = np.bincount(self.labels[(self.grid != 1).reshape(-1)], minlength=self.rows * self.cols)
+        used = np.flatnonzero(counts)
+        self.sizes = dict(zip(used.tolist(), counts[used].tolist()))  # label -> free cells in the component
+        self.next_label = self.rows * self.cols  # new components get labels that no cell index can collide with
+        self.walls = memoryview(self.grid.reshape(-1))
+        self.links = memoryview(self.labels)  # fast scalar access for the incremental updates
+
+    def find(self, cell):
+        return self.links[cell]
+
+    def neighbours(self, cell):
+        x, y = divmod(cell, self.cols)
+        for nx, ny in [(x, y + 1), (x + 1, y), (x, y - 1), (x - 1, y)]:
+            if 0 <= nx < self.rows and 0 <= ny < self.cols:
+                yield nx * self.cols + ny
+
+    def component(self, x, y):
+        """Label of the component of a free cell, -1 for walls and cells outside the maze."""
+        if not (0 <= x < self.rows and 0 <= y < self.cols) or self.grid[x, y] == 1:
+            return -1
+        return self.find(x * self.cols + y)
+
+    def connected(self, start, goal):
+        """Can `astar` reach `goal` from `start`? Like `astar`, a start inside a wall may still step out of it."""
+        if tuple(start) == tuple(goal):
+            return True
+        goal = self.component(*goal)
+        if goal == -1:
+            return False
+        if self.component(*start) == goal:
+            return True
+        if 0 <= start[0] < self.rows and 0 <= start[1] < self.cols and self.grid[start[0], start[1]] == 1:
+            cell = start[0] * self.cols + start[1]
+            return any(self.walls[n] != 1 and self.find(n) == goal for n in self.neighbours(cell))
+        return False
+
+    def astar(self, start, goal, H=h1, mode="astar"):
+        """`astar` on the indexed maze that answers -1 straight away when `goal` cannot be reached from `start`."""
+        if tuple(start) != tuple(goal) and not self.connected(start, goal):
+            return -1, ([], [])
+        return astar(self.grid, start, goal, H, mode)
+
+    def set_cell(self, x, y, value):
+        """
+        Change one cell (0 - empty space, 1 - wall, 2..255 - terrain) and update the labels.
+
+        A freed cell costs the size of the components it merges into a larger one; a new wall costs about the
+        number of its free neighbours times the size of all but the largest piece it leaves behind.
+        """
+        old = self.grid[x, y]
+        self.grid[x, y] = value
+        if (old == 1) == (value == 1):  # terrain edits do not change connectivity
+            return
+        cell = x * self.cols + y
+        links, sizes = self.links, self.sizes
+
+        if value != 1:  # a new free cell joins the components around it
+            around = {self.find(n) for n in self.neighbours(cell) if self.walls[n] != 1}
+            keep = max(around, key=sizes.get) if around else self._new_label()
+            links[cell] = keep
+            sizes[keep] = sizes.get(keep, 0) + 1
+            for n in self.neighbours(cell):
+                if self.walls[n] != 1 and self.find(n) != keep:
+                    self._relabel(n, keep)
+            return
+
+        # a new wall may split its component
+        label = links[cell]
+        links[cell] = cell
+        sizes[label] -= 1
+        if not sizes[label]:
+            del sizes[label]
+        probes = [n for n in self.neighbours(cell) if self.walls[n] != 1]
+        group = list(range(len(probes)))  # union-find over the probes, merged when their searches meet
+
+        def root(i):
+            while group[i] != i:
+                i = group[i]
+            return i
+
+        owner = {}  # cell -> probe that reached it first
+        queues = [[n] for n in probes]
+        heads = [0] * len(probes)
+        for i, n in enumerate(probes):
+            if n in owner:
+                group[root(i)] = root(owner[n])
+            owner[n] = i
+        while True:
+            roots = {root(i) for i in range(len(probes))}
+            running = {root(i) for i in range(len(probes)) if heads[i] < len(queues[i])}
+            if len(roots) <= 1 or len(running) <= 1:  # no split, or every piece but one is complete
+                break
+            for i in range(len(probes)):  # one step of every probe that still has cells to visit
+                if heads[i] == len(queues[i]):
+                    continue
+                curr = queues[i][heads[i]]
+                heads[i] += 1
+                for nxt in self.neighbours(curr):
+                    if self.walls[nxt] == 1:
+                        continue
+                    j = owner.get(nxt)
+                    if j is None:
+                        owner[nxt] = i
+                        queues[i].append(nxt)
+                    elif root(j) != root(i):
+                        group[root(j)] = root(i)
+
+        if len(roots) <= 1:  # the component is still in one piece
+            return
+        pieces = {r: [] for r in roots}
+        for curr, i in owner.items():
+            pieces[root(i)].append(curr)
+        # probes that still run are in the piece that keeps the label, otherwise the largest piece keeps it
+        kept = next(iter(running)) if running else max(pieces, key=lambda r: len(pieces[r]))
+        for r, cells in pieces.items():
+            if r != kept:
+                new = self._new_label()
+                for curr in cells:
+                    links[curr] = new
+                sizes[new] = len(cells)
+                sizes[label] -= len(cells)
+
+    def _new_label(self):
+        self.next_label += 1
+        return self.next_label - 1
+
+    def _relabel(self, start, new):
+        """Move the whole component of `start` to label `new`."""
+        links, label = self.links, self.find(start)
+        links[start] = new
+        queue = [start]
+        for curr in queue:  # the list grows while it is walked
+            for nxt in self.neighbours(curr):
+                if self.walls[nxt] != 1 and links[nxt] == label:
+                    links[nxt] = new
+                    queue.append(nxt)
+        self.sizes[new] += len(queue)
+        del self.sizes[label]
+
+
+def label(grid):
+    """
+    Component labels for the free cells of a 2D uint8 grid (walls keep their own index), as a flat int32
+    array where every cell points at the root of its component. Repeatedly hooks the larger root of every
+    free neighbour pair under the smaller one and flattens the trees by pointer jumping, all in NumPy.
+    """
+
+    rows, cols = grid.shape
+    parent = np.arange(rows * cols, dtype=np.int32)
+    free = (grid != 1).reshape(-1)
+    ids = parent.reshape(rows, cols)
+    pairs = [(ids[:, :-1], ids[:, 1:]), (ids[:-1, :], ids[1:, :])]
+    u = np.concatenate([a.reshape(-1) for a, _ in pairs])
+    v = np.concatenate([b.reshape(-1) for _, b in pairs])
+    both = free[u] & free[v]
+    u, v = u[both], v[both]
+
+    while True:
+        pu, pv = parent[u], parent[v]
+        differ = pu != pv
+        if not differ.any():
+            return parent
+        u, v, pu, pv = u[differ], v[differ], pu[differ], pv[differ]
+        np.minimum.at(parent, np.maximum(pu, pv), np.minimum(pu, pv))  # hook
+        while True:  # jump
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+
+
+if __name__ == "__main__":
+    import time
+    from benchmark import open_maze
+
+    maze = open_maze(1024, fill=0.4)
+    t = time.perf_counter()
+    index = Components(maze)
+    print(f"index built in {time.perf_counter() - t:.3f}s")
+
+    start = next((x, y) for x in range(1024) for y in range(1024) if maze[x][y] == 0)
+    for goal in [(1023, 1023), (512, 512), (5000, 5000)]:
+        t = time.perf_counter()
+        num_steps, (path, visited) = astar(index.grid, start, goal)
+        t_astar = time.perf_counter() - t
+        t = time.perf_counter()
+        num_steps_idx, (path, visited_idx) = index.astar(start, goal)
+        t_index = time.perf_counter() - t
+        print(f"{start} -> {goal}: astar {num_steps} ({len(visited)} expanded, {t_astar:.3f}s) | "
+              f"indexed {num_steps_idx} ({len(visited_idx)} expanded, {t_index:.3f}s)")
@@ -0,0 +1,285 @@
+import heapq
+
+import numpy as np
+
+from lab1_cg106_g18_v3_Melnyk_Zacharneva import search, flat_grid, path_cost, Node, h2
+
+ENTRANCE_SPLIT = 6  # border runs at least this long get two entrances (one at each end) instead of one in the middle
+
+
+class HPA:
+    """
+    Hierarchical pathfinding (HPA*) over a lab1 maze.
+
+    The maze is split into `cluster` x `cluster` blocks. Where two neighbouring blocks share free cells on
+    their border, entrances are placed; the entrance cells are the nodes of an abstract graph, joined by
+    edges across the border (the cost of the cell entered) and by in-cluster distances inside a block.
+    Terrain costs count like in `astar` (see `step_cost`), so edges are directed: a -> b may cost
+    something else than b -> a.
+    Queries search the small abstract graph and refine each abstract edge back into cells, so the path
+    is near-optimal rather than optimal. `set_cell` only rebuilds the blocks whose borders or insides changed.
+    """
+
+    def __init__(self, maze, cluster=16) -> None:
+        self.grid = np.array(maze, dtype=np.uint8)  # own copy, edited by `set_cell`
+        self.rows, self.cols = self.grid.shape
+        self.size = cluster
+        self.borders = {}  # (cluster, "down" / "right") -> [(cell on this side, cell on the other side)]
+        self.intra = {}  # cluster -> {node: {node: cost}}, distances inside the cluster, from the outer node
+        self.inter = {}  # node -> {node on the other side of a border}
+
+        for cluster in self.clusters():
+            self._build_borders(cluster)
+        for cluster in self.clusters():
+            self._build_intra(cluster)
+
+    # layout
+    def clusters(self):
+        for cx in range(-(-self.rows // self.size)):
+            for cy in range(-(-self.cols // self.size)):
+                yield cx, cy
+
+    def cluster_of(self, cell):
+        return cell[0] // self.size, cell[1] // self.size
+
+    def bounds(self, cluster):
+        x0, y0 = cluster[0] * self.size, cluster[1] * self.size
+        return x0, y0, min(x0 + self.size, self.rows), min(y0 + self.size, self.cols)
+
+    def nodes(self, cluster):
+        """Entrance cells that lie inside `cluster`."""
+        cx, cy = cluster
+        nodes = set()
+        for key, side in [((cluster, "down"), 0), ((cluster, "right"), 0),
+                          (((cx - 1, cy), "down"), 1), (((cx, cy - 1), "right"), 1)]:
+            nodes.update(pair[side] for pair in self.borders.get(key, []))
+        return nodes
+
+    # abstract graph
+    def _build_borders(self, cluster):
+        """Entrances on the bottom and right borders of `cluster`. Returns the keys of borders that changed."""
+        x0, y0, x1, y1 = self.bounds(cluster)
+        changed = []
+        for direction in ["down", "right"]:
+            if direction == "down" and x1 < self.rows:
+                pairs = [((x1 - 1, y), (x1, y)) for y in range(y0, y1)]
+            elif direction == "right" and y1 < self.cols:
+                pairs = [((x, y1 - 1), (x, y1)) for x in range(x0, x1)]
+            else:
+                continue
+
+            entrances, run = [], []
+            for a, b in pairs + [(None, None)]:  # the sentinel closes the last run
+                if a is not None and self.grid[a] != 1 and self.grid[b] != 1:
+                    run.append((a, b))
+                    continue
+                if len(run) >= ENTRANCE_SPLIT:
+                    entrances += [run[0], run[-1]]
+                elif run:
+                    entrances.append(run[len(run) // 2])
+                run = []
+
+            key = (cluster, direction)
+            for a, b in self.borders.get(key, []):
+                for u, v in [(a, b), (b, a)]:
+                    self.inter[u].discard(v)
+                    if not self.inter[u]:  # no longer an entrance, same as a fresh build
+                        del self.inter[u]
+            for a, b in entrances:
+                self.inter.setdefault(a, set()).add(b)
+                self.inter.setdefault(b, set()).add(a)
+            if self.borders.get(key) != entrances:
+                changed.append(key)
+            self.borders[key] = entrances
+        return changed
+
+    def _build_intra(self, cluster):
+        nodes = self.nodes(cluster)
+        self.intra[cluster] = {node: self.local_distances(node, nodes - {node}) for node in nodes}
+
+    def local_distances(self, a, targets):
+        """
+        In-cluster distances from `a` to every reachable cell of `targets`. One pass replaces a separate
+        search for every target: breadth-first on unit-cost clusters, Dijkstra (A* with a zero heuristic)
+        on clusters with terrain.
+        """
+        x0, y0, x1, y1 = self.bounds(self.cluster_of(a))
+        block = self.grid[x0:x1, y0:y1]
+        rows, cols, walls = flat_grid(block)
+        wanted = {(x - x0) * cols + (y - y0): (x, y) for x, y in targets}
+        source = (a[0] - x0) * cols + (a[1] - y0)
+        dist, found = {source: 0}, {}
+
+        if block.max(initial=0) <= 1:  # every step costs 1, the first visit is the shortest
+            queue = [source]
+            for curr in queue:  # the list grows while it is walked
+                if curr in wanted:
+                    found[wanted[curr]] = dist[curr]
+                    if len(found) == len(wanted):
+                        break
+                x, y = divmod(curr, cols)
+                for nx, ny in [(x, y + 1), (x + 1, y), (x, y - 1), (x - 1, y)]:
+                    cell = nx * cols + ny
+                    if 0 <= nx < rows and 0 <= ny < cols and walls[cell] != 1 and cell not in dist:
+                        dist[cell] = dist[curr] + 1
+                        queue.append(cell)
+            return found
+
+        frontier = [(0, source)]
+        while frontier:
+            d, curr = heapq.heappop(frontier)
+            if d > dist[curr]:  # stale entry
+                continue
+            if curr in wanted:
+                found[wanted[curr]] = d
+                if len(found) == len(wanted):
+                    break
+            x, y = divmod(curr, cols)
+            for nx, ny in [(x, y + 1), (x + 1, y), (x, y - 1), (x - 1, y)]:
+                cell = nx * cols + ny
+                if 0 <= nx < rows and 0 <= ny < cols and walls[cell] != 1:
+                    g = d + (walls[cell] or 1)  # see `step_cost`
+                    if g < dist.get(cell, float("inf")):
+                        dist[cell] = g
+                        heapq.heappush(frontier, (g, cell))
+        return found
+
+    def local_path(self, a, b):
+        """Shortest path from `a` to `b` that stays inside their (common) cluster, empty if there is none."""
+        x0, y0, x1, y1 = self.bounds(self.cluster_of(a))
+        num_steps, path, _ = search(self.grid[x0:x1, y0:y1], (a[0] - x0, a[1] - y0), (b[0] - x0, b[1] - y0), h2)
+        return [(x + x0, y + y0) for x, y in path]
+
+    def set_cell(self, x, y, value):
+        """
+        Change one cell (0 - empty space, 1 - wall, 2..255 - terrain) and rebuild only the clusters it affects.
+        Returns them.
+        """
+        if self.grid[x, y] == value:
+            return set()
+        self.grid[x, y] = value
+
+        cluster = self.cluster_of((x, y))
+        cx, cy = cluster
+        touched = {cluster}
+        # borders next to the cell: its own bottom/right ones and the bottom/right ones of the clusters above/left
+        for owner in [cluster, (cx - 1, cy), (cx, cy - 1)]:
+            if owner[0] >= 0 and owner[1] >= 0:
+                for (cx2, cy2), direction in self._build_borders(owner):
+                    touched.update([(cx2, cy2), (cx2 + 1, cy2) if direction == "down" else (cx2, cy2 + 1)])
+        for c in touched:
+            self._build_intra(c)
+        return touched
+
+    # queries
+    def find_path(self, start, goal):
+        """
+        Near-optimal path from `start` to `goal` through the abstract graph.
+        Returns the same `(steps, (path, visited))` shape as `astar`; `visited` holds expanded abstract nodes.
+        Like `astar`, goals in walls or outside the maze give -1 and a start inside a wall may step out of it.
+        A start outside the maze gives -1.
+        """
+
+        start, goal = tuple(start), tuple(goal)
+        inside = [0 <= cell[0] < self.rows and 0 <= cell[1] < self.cols for cell in [start, goal]]
+        if not inside[0]:
+            return -1, ([], [])
+        if start == goal:
+            return 1, ([start], [Node(*start)])
+        if not inside[1] or self.grid[goal] == 1:
+            return -1, ([], [])
+        if self.grid[start] == 1:  # the cheapest way on from one of its free neighbours
+            best, best_cost, visited = [], float("inf"), []
+            x, y = start
+            for cell in [(x, y + 1), (x + 1, y), (x, y - 1), (x - 1, y)]:
+                if 0 <= cell[0] < self.rows and 0 <= cell[1] < self.cols and self.grid[cell] != 1:
+                    steps, (path, expanded) = self.find_path(cell, goal)
+                    visited += expanded
+                    if steps != -1 and path_cost(self.grid, [start] + path) < best_cost:
+                        best, best_cost = [start] + path, path_cost(self.grid, [start] + path)
+            return (len(best) if best else -1), (best, visited)
+
+        # start and goal join the graph for this query only: edges out of the start and into the goal
+        targets = self.nodes(self.cluster_of(start)) - {start}
+        if self.cluster_of(start) == self.cluster_of(goal):
+            targets.add(goal)
+        temp = {start: self.local_distances(start, targets)}
+        # walked backwards, a path stops paying for the cell it ends in and pays for the one it starts from,
+        # so one pass from the goal gives the distances into it
+        goal_cost = int(self.grid[goal]) or 1
+        for node, cost in self.local_distances(goal, self.nodes(self.cluster_of(goal)) - {goal}).items():
+            temp.setdefault(node, {})[goal] = cost - (int(self.grid[node]) or 1) + goal_cost
+
+        def neighbours(node):
+            yield from self.intra[self.cluster_of(node)].get(node, {}).items()
+            for other in self.inter.get(node, ()):
+                yield other, int(self.grid[other]) or 1
+            yield from temp.get(node, {}).items()
+
+        goal_node = Node(*goal)
+        probe = Node(0, 0)
+        best_g, parent = {start: 0}, {start: None}
+        closed, visited = set(), []
+        frontier = [(0, 0, start)]
+        while frontier:
+            _, _, curr = heapq.heappop(frontier)
+            if curr in closed:
+                continue
+            closed.add(curr)
+            visited.append(Node(*curr))
+            if curr == goal:
+                break
+            for node, cost in neighbours(curr):
+                g = best_g[curr] + cost
+                if node in closed or g >= best_g.get(node, float("inf")):
+                    continue
+                best_g[node], parent[node] = g, curr
+                probe.x, probe.y = node
+                heapq.heappush(frontier, (g + h2(goal_node, probe), -g, node))
+        else:
+            return -1, ([], visited)
+
+        abstract = []
+        node = goal
+        while node is not None:
+            abstract.append(node)
+            node = parent[node]
+        abstract.reverse()
+
+        path = [start]
+        for a, b in zip(abstract, abstract[1:]):  # refine
+            if self.cluster_of(a) != self.cluster_of(b):  # inter edge, neighbouring cells
+                path.append(b)
+            else:
+                path += self.local_path(a, b)[1:]
+        return len(path), (path, visited)
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    from benchmark import open_maze, backtracker_maze
+
+    for name, maze in [("open 512", open_maze(512)), ("maze 512", backtracker_maze(512))]:
+        size = len(maze)
+        t = time.perf_counter()
+        hpa = HPA(maze, cluster=32)
+        print(f"{name}: built in {time.perf_counter() - t:.2f}s, {len(hpa.inter)} abstract nodes")
+
+        rng = random.Random(18)
+        cells = [(x, y) for x in range(size) for y in range(size) if maze[x][y] == 0]
+        grid = np.array(maze, dtype=np.uint8)
+        for start, goal in [(rng.choice(cells), rng.choice(cells)) for _ in range(5)]:
+            t = time.perf_counter()
+            steps, (path, visited) = hpa.find_path(start, goal)
+            t_hpa = time.perf_counter() - t
+            t = time.perf_counter()
+            optimal, _, expanded = search(grid, start, goal, h2, trace=True)
+            t_astar = time.perf_counter() - t
+            print(f"  HPA* {steps:>6} steps in {t_hpa:.3f}s ({len(visited)} abstract nodes) | "
+                  f"A* {optimal:>6} steps in {t_astar:.3f}s ({len(expanded)} nodes)")
+
+        x, y = rng.choice(cells)
+        t = time.perf_counter()
+        touched = hpa.set_cell(x, y, 1)
+        print(f"  wall at {(x, y)}: rebuilt {len(touched)} cluster(s) in {time.perf_counter() - t:.3f}s")
@@ -1,6 +1,10 @@
 import heapq
 import math
-import copy
+import time
+from array import array
+from itertools import chain
+
+import numpy as np
 
 COLAB = 0
 
@@ -18,6 +22,8 @@ from matplotlib.colors import ListedColormap
 
 # node
 class Node:
+    __slots__ = ("x", "y", "g", "h", "parent")
+
     def __init__(self, x, y) -> None:
         self.x, self.y = x, y
         self.g, self.h = 0, 0
@@ -51,73 +57,679 @@ def h3(goal: "Node", node: "Node"):
     return max(abs(goal.x - node.x), abs(goal.y - node.y))
 
 
+# maze input
+def flat_grid(maze):
+    """
+    Shape and a flat, indexable view of `maze`: cell (x, y) is `cells[x * cols + y]`.
+
+    `maze` can be a nested list or a 2D uint8 NumPy array / `np.memmap`. A C-contiguous
+    uint8 array is viewed directly, nothing is copied; a nested list is packed into bytes.
+    """
+    if isinstance(maze, np.ndarray):
+        rows, cols = maze.shape
+        grid = np.ascontiguousarray(maze, dtype=np.uint8)  # no-op for contiguous uint8 arrays and memmaps
+        return rows, cols, memoryview(grid.reshape(-1))
+    rows, cols = len(maze), len(maze[0])
+    return rows, cols, bytes(chain.from_iterable(maze))
+
+
+def load_npy(path, mmap=True):
+    """Load a maze saved with `np.save`. By default the file is memory-mapped read-only instead of read into memory."""
+    return np.load(path, mmap_mode="r" if mmap else None)
+
+
+def load_raw(path, shape):
+    """Memory-map a raw file of `rows * cols` bytes (0 - empty space, 1 - wall) as a maze."""
+    return np.memmap(path, dtype=np.uint8, mode="r", shape=shape)
+
+
+def load_png(path, threshold=0.5):
+    """Load a black-and-white image as a maze: dark pixels are walls, light pixels are empty space."""
+    image = plt.imread(path)  # floats in [0, 1] for PNG
+    if image.ndim == 3:  # RGB(A) -> grayscale, alpha is ignored
+        image = image[..., :3].mean(axis=2)
+    return (image < threshold).astype(np.uint8)
+
+
+# search limits
+CLOCK_EVERY = 1024  # expansions between two looks at the clock when a deadline is set
+
+
+class SearchInterrupted(Exception):
+    """Raised by `search` when it runs out of `max_expansions` or hits its `deadline`."""
+
+
+def _next_check(expanded, max_expansions, deadline):
+    check = expanded + CLOCK_EVERY if deadline is not None else math.inf
+    return check if max_expansions is None else min(check, max_expansions)
+
+
+# instrumentation
+class SearchStats:
+    """
+    Counters and optional hooks for one `search` run, pass an instance as its `stats` argument.
+
+    Hooks get cell coordinates: `on_push(x, y, g, f)`, `on_expand(x, y, g)` and `on_goal(path)`.
+    The counters are kept by wrapping the heap operations and `H` that `search` calls, so a search
+    without `stats` runs the same loop as an uninstrumented one.
+    """
+
+    def __init__(self, on_expand=None, on_push=None, on_goal=None) -> None:
+        self.on_expand, self.on_push, self.on_goal = on_expand, on_push, on_goal
+        self.pushes = 0
+        self.pops = 0
+        self.expanded = 0
+        self.max_frontier = 0
+        self.heuristic_calls = 0
+        self.heuristic_time = 0.0  # seconds spent inside H
+
+    @property
+    def duplicates(self):
+        """Stale frontier entries skipped on pop (a cheaper copy of the cell was expanded before)."""
+        return self.pops - self.expanded
+
+    def wrap(self, H, state, trace):
+        """Counting versions of `H`, `heappush`, `heappop` and of the expansion step of `search`."""
+        clock = time.perf_counter
+        on_expand, on_push = self.on_expand, self.on_push
+
+        def timed_H(goal, node):
+            self.heuristic_calls += 1
+            t = clock()
+            h = H(goal, node)
+            self.heuristic_time += clock() - t
+            return h
+
+        def push(frontier, entry):
+            heapq.heappush(frontier, entry)
+            self.pushes += 1
+            if len(frontier) > self.max_frontier:
+                self.max_frontier = len(frontier)
+            if on_push is not None:
+                f, neg_g, cell = entry
+                on_push(*state.coords(cell), -neg_g, f)
+
+        def pop(frontier):
+            self.pops += 1
+            return heapq.heappop(frontier)
+
+        def expand(cell):
+            self.expanded += 1
+            if trace:
+                state.order.append(cell)
+            if on_expand is not None:
+                on_expand(*state.coords(cell), state.g[cell])
+
+        return timed_H, push, pop, expand
+
+    def as_dict(self):
+        return {"pushes": self.pushes, "pops": self.pops, "duplicates": self.duplicates, "expanded": self.expanded,
+                "max_frontier": self.max_frontier, "heuristic_calls": self.heuristic_calls,
+                "heuristic_time": self.heuristic_time}
+
+    def __repr__(self) -> str:
+        return "SearchStats(" + ", ".join(f"{key}={value}" for key, value in self.as_dict().items()) + ")"
+
+
+# terrain
+def step_cost(value):
+    """
+    Cost of moving into a cell with this maze value: 0 - empty space (cost 1), 1 - wall,
+    2..255 - terrain that costs `value`. Mazes of 0 and 1 only are plain unit-cost grids.
+    """
+    return math.inf if value == 1 else (value or 1)
+
+
+def path_cost(maze, path):
+    """Total cost of moving along `path` (the start cell is free)."""
+    rows, cols, walls = flat_grid(maze)
+    return sum(step_cost(walls[x * cols + y]) for x, y in path[1:])
+
+
+# flat search state
+UNSEEN = 2 ** 31 - 1  # g of a cell that was not discovered yet
+
+
+class SearchState:
+    """
+    Struct-of-arrays search state. A cell (x, y) is the flat id `x * cols + y`,
+    its g and parent are kept in preallocated int32 buffers instead of `Node` objects.
+    """
+
+    def __init__(self, rows, cols) -> None:
+        self.rows, self.cols = rows, cols
+        size = rows * cols
+        self.g = array("i", [UNSEEN]) * size
+        self.parent = array("i", [-1]) * size
+        self.closed = bytearray(size)
+        self.order = array("i")  # expansion order, only filled when tracing
+
+    def cell(self, x, y):
+        return x * self.cols + y
+
+    def coords(self, cell):
+        return divmod(cell, self.cols)
+
+    def node(self, cell) -> Node:
+        """`Node` view of a cell with its g; its `parent` is left None, use `path` to walk back to the start."""
+        node = Node(*self.coords(cell))
+        node.g = self.g[cell]
+        return node
+
+    def path(self, cell):
+        """Rebuild the path from the start to `cell` from the parent buffer."""
+        path = []
+        while cell != -1:  # backtrack
+            path.append(self.coords(cell))  # path is reversed here
+            cell = self.parent[cell]
+        path.reverse()
+        return path
+
+
+class Trace:
+    """Read-only list of `Node` objects over the expansion order of a `SearchState`."""
+
+    def __init__(self, state: SearchState) -> None:
+        self.state = state
+
+    def __len__(self):
+        return len(self.state.order)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.state.node(cell) for cell in self.state.order[i]]
+        return self.state.node(self.state.order[i])
+
+    def __iter__(self):
+        return map(self.state.node, self.state.order)
+
+
 # algo
-def astar(maze, start, goal, H=h1):
+def search(maze, start, goal, H=h1, trace=False, max_expansions=None, deadline=None, weight=1, stats=None):
+    """
+    A* search core
+
+    The search state is kept in flat arrays (see `SearchState`): the closed set is a byte per cell
+    and the open set is indexed by the g buffer, so every membership check is O(1).
+    Frontier entries are `(f, -g, cell)` tuples, so ties on f go to the deeper node. When a cheaper route to a node in the
+    frontier is found, a new entry is pushed and the old one is skipped when it is popped (lazy deletion).
+
+    Parameters:
+    - maze, start, goal, H: same as for `astar`
+    - trace: keep the order in which nodes were expanded (required for vizualization)
+    - max_expansions: give up with `SearchInterrupted` after expanding this many nodes
+    - deadline: give up with `SearchInterrupted` once `time.perf_counter()` passes this value
+    - weight: f = g + weight * h; above 1 the search is faster, the path at most `weight` times longer
+    - stats: a `SearchStats` to fill with counters and to call the hooks of, None keeps the loop uninstrumented
+
+    Returns:
+    - Number of steps from start to goal, equals -1 if the path is not found
+    - Path from start to goal as a list of coordinates, empty if the path is not found
+    - Expanded nodes in order as a `Trace`, empty if `trace` is not set
+    """
+
+    rows, cols, walls = flat_grid(maze)
+    state = SearchState(rows, cols)
+    g_buf, parent, closed, order = state.g, state.parent, state.closed, state.order
+
+    goal_node = Node(*goal)
+    probe = Node(0, 0)  # reused for every heuristic call instead of allocating nodes
+    goal = -1
+    if 0 <= goal_node.x < rows and 0 <= goal_node.y < cols:
+        goal = goal_node.x * cols + goal_node.y
+
+    push, pop, expand = heapq.heappush, heapq.heappop, order.append
+    if stats is not None:  # swap in counting versions, the loop itself stays the same
+        H, push, pop, expand = stats.wrap(H, state, trace)
+        trace = True  # `expand` now records the order only if tracing was asked for
+
+    start = start[0] * cols + start[1]
+    g_buf[start] = 0
+    frontier = []  # frontier - priority queue
+    push(frontier, (0, 0, start))
+    expanded = 0
+    next_check = _next_check(expanded, max_expansions, deadline)
+
+    while frontier:  # while frontier is not empty
+        _, _, curr = pop(frontier)  # pick a node from a frontier
+        if closed[curr]:  # stale entry, a cheaper copy was already expanded
+            continue
+        closed[curr] = 1  # mark the node as visited
+        if trace:
+            expand(curr)
+
+        if curr == goal:  # if node is a goal
+            path = state.path(curr)
+            if stats is not None and stats.on_goal is not None:
+                stats.on_goal(path)
+            return len(path), path, Trace(state)
+
+        expanded += 1
+        if expanded >= next_check:  # only reached when a limit is set
+            if max_expansions is not None and expanded >= max_expansions:
+                raise SearchInterrupted(f"gave up after {expanded} expansions")
+            if deadline is not None and time.perf_counter() > deadline:
+                raise SearchInterrupted(f"deadline passed after {expanded} expansions")
+            next_check = _next_check(expanded, max_expansions, deadline)
+
+        x, y = divmod(curr, cols)
+        g_curr = g_buf[curr]
+        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:  # actions (down, right, up, left)
+            nx, ny = x + dx, y + dy
+
+            if nx < 0 or ny < 0 or nx >= rows or ny >= cols:  # skip if out of borders
+                continue
+            cell = nx * cols + ny
+            cost = walls[cell]
+            if cost == 1:  # skip if a wall
+                continue
+            if closed[cell]:  # skip if already visited
+                continue
+            g = g_curr + (cost or 1)  # see `step_cost`
+            if g >= g_buf[cell]:  # skip if already in the frontier with a better or equal cost
+                continue
+            g_buf[cell] = g
+            parent[cell] = curr
+
+            probe.x, probe.y = nx, ny
+            push(frontier, (g + weight * H(goal_node, probe), -g, cell))  # ties go to the deeper node
+
+    return -1, [], Trace(state)  # if no goal found
+
+
+def astar(maze, start, goal, H=h1, mode="astar", trace=True, stats=None):
     """
     A* search
 
     Parameters:
-    - maze: The 2D matrix that represents the maze with 0 represents empty space and 1 represents a wall
+    - maze: The 2D matrix that represents the maze with 0 represents empty space and 1 represents a wall,
+      a nested list or a uint8 NumPy array / np.memmap (see `load_npy`, `load_raw`, `load_png`);
+      values 2..255 are terrain that costs that much to enter (see `step_cost`)
     - start: A tuple with the coordinates of starting position
     - goal: A tuple with the coordinates of finishing position
+    - H: heuristic function
+    - mode: "astar", "dial" (A* over a bucket queue, for integer terrain costs), or the unit-cost only
+      "jps" (Jump Point Search) and "bidirectional" (bidirectional A*), which treat terrain as empty space
+    - trace: keep the expanded nodes for visualisation; without it `visited` stays empty and costs no memory
+    - stats: a `SearchStats` with counters and hooks, filled by the "astar" mode only
 
     Returns:
     - Number of steps from start to goal, equals -1 if the path is not found
     - Viz - everything required for step-by-step visualisation
     """
 
-    start_node = Node(*start)
+    if mode != "astar":
+        if stats is not None:
+            raise ValueError(f"stats are collected by the \"astar\" mode only, not by {mode!r}")
+        return SEARCH_MODES[mode](maze, start, goal, H, trace)
+
+    num_steps, path, visited = search(maze, start, goal, H, trace=trace, stats=stats)
+    return num_steps, (path, visited)
+
+
+def jps(maze, start, goal, H=h1, trace=True):
+    """
+    Jump Point Search for uniform-cost 4-connected grids
+
+    Instead of pushing every neighbour, the search jumps along straight lines and only stops at
+    jump points - cells where the optimal path may turn (forced neighbours) or the goal.
+    Moves along y stop on forced neighbours; moves along x also stop where a jump along y
+    would find a jump point. Path lengths are the same as for `astar`.
+
+    Parameters and return value are the same as for `astar`; `visited` holds the expanded jump points.
+    """
+
+    rows, cols, walls = flat_grid(maze)
+    state = SearchState(rows, cols)
+    g_buf, parent, closed, order = state.g, state.parent, state.closed, state.order
+
     goal_node = Node(*goal)
+    probe = Node(0, 0)
+    goal = -1
+    if 0 <= goal_node.x < rows and 0 <= goal_node.y < cols:
+        goal = goal_node.x * cols + goal_node.y
+
+    def free(x, y):
+        return 0 <= x < rows and 0 <= y < cols and walls[x * cols + y] != 1
+
+    def jump_y(x, y, dy):  # move along y until a forced neighbour, the goal or a wall
+        while True:
+            y += dy
+            if not free(x, y):
+                return -1
+            cell = x * cols + y
+            if cell == goal:
+                return cell
+            if (free(x - 1, y) and not free(x - 1, y - dy)) or (free(x + 1, y) and not free(x + 1, y - dy)):
+                return cell
+
+    def jump_x(x, y, dx):  # move along x, every step also looks sideways along y
+        while True:
+            x += dx
+            if not free(x, y):
+                return -1
+            cell = x * cols + y
+            if cell == goal:
+                return cell
+            if (free(x, y - 1) and not free(x - dx, y - 1)) or (free(x, y + 1) and not free(x - dx, y + 1)):
+                return cell
+            if jump_y(x, y, 1) != -1 or jump_y(x, y, -1) != -1:
+                return cell
+
+    start = start[0] * cols + start[1]
+    g_buf[start] = 0
+    frontier = [(0, 0, start)]
+
+    while frontier:
+        _, _, curr = heapq.heappop(frontier)
+        if closed[curr]:  # stale entry
+            continue
+        closed[curr] = 1
+        if trace:
+            order.append(curr)
+
+        if curr == goal:
+            path = _jps_path(state, curr)
+            return len(path), (path, Trace(state))
+
+        x, y = divmod(curr, cols)
+        if parent[curr] == -1:  # start node: every direction
+            directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+        else:  # keep going straight or turn, never go back
+            px, py = divmod(parent[curr], cols)
+            dx, dy = (x > px) - (x < px), (y > py) - (y < py)
+            directions = [(0, dy), (1, 0), (-1, 0)] if dy else [(dx, 0), (0, 1), (0, -1)]
+
+        for dx, dy in directions:
+            jump_point = jump_x(x, y, dx) if dx else jump_y(x, y, dy)
+            if jump_point == -1 or closed[jump_point]:
+                continue
+            nx, ny = divmod(jump_point, cols)
+            g = g_buf[curr] + abs(nx - x) + abs(ny - y)
+            if g >= g_buf[jump_point]:
+                continue
+            g_buf[jump_point] = g
+            parent[jump_point] = curr
 
-    frontier = []  # frontier - priority queue
-    visited = []  # used as a set (required for vizualization)
+            probe.x, probe.y = nx, ny
+            heapq.heappush(frontier, (g + H(goal_node, probe), -g, jump_point))
 
-    heapq.heappush(frontier, start_node)
+    return -1, ([], Trace(state))
 
-    while frontier:  # while frontier is not empty
-        curr_node = heapq.heappop(frontier)  # pick a node from a frontier
-        visited.append(curr_node)  # mark the node as visited
 
-        if curr_node.x == goal_node.x and curr_node.y == goal_node.y:  # if node is a goal
-            path = []
-            while curr_node:  # backtrack
-                path.append((curr_node.x, curr_node.y))  # path is reversed here
-                curr_node = curr_node.parent
-            path.reverse()
-            return len(path), (path, visited)
+def _jps_path(state: SearchState, cell):
+    """Path through the jump points leading to `cell` with the straight segments between them filled in."""
+    jump_points = state.path(cell)
+    path = jump_points[:1]
+    for (x, y), (nx, ny) in zip(jump_points, jump_points[1:]):
+        dx, dy = (nx > x) - (nx < x), (ny > y) - (ny < y)
+        while (x, y) != (nx, ny):
+            x, y = x + dx, y + dy
+            path.append((x, y))
+    return path
 
-        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:  # actions (down, right, up, left)
-            next_node = Node(curr_node.x + dx, curr_node.y + dy)
 
-            if next_node in visited:  # skip if already visited
+def bidirectional(maze, start, goal, H=h1, trace=True):
+    """
+    Bidirectional A* search
+
+    Searches forward from `start` (heuristic towards `goal`) and backward from `goal` (heuristic
+    towards `start`), always expanding the side with the smaller frontier. Every time a side reaches
+    a cell already discovered by the other one, the joined path is a candidate; the best candidate is
+    optimal once the smallest f in either frontier is not below its length (admissible `H`).
+
+    Parameters and return value are the same as for `astar`; `visited` holds the nodes expanded by both sides.
+    """
+
+    rows, cols, walls = flat_grid(maze)
+    if (not (0 <= goal[0] < rows and 0 <= goal[1] < cols) or walls[goal[0] * cols + goal[1]] == 1
+            or tuple(start) == tuple(goal)):
+        num_steps, path, visited = search(maze, start, goal, H, trace)  # nothing to search backward from
+        return num_steps, (path, visited)
+
+    sides = []
+    for source, target in [(start, goal), (goal, start)]:
+        state = SearchState(rows, cols)
+        cell = source[0] * cols + source[1]
+        state.g[cell] = 0
+        sides.append((state, [(0, 0, cell)], Node(*target)))
+
+    probe = Node(0, 0)
+    order = []  # (side, cell) in expansion order
+    best, meet = math.inf, -1  # length (in moves) of the best joined path and the cell where the halves meet
+
+    while sides[0][1] and sides[1][1]:
+        if best <= max(sides[0][1][0][0], sides[1][1][0][0]):  # no cheaper path can be found
+            break
+
+        side = 0 if len(sides[0][1]) <= len(sides[1][1]) else 1
+        state, frontier, target_node = sides[side]
+        other = sides[1 - side][0]
+        g_buf, closed = state.g, state.closed
+
+        _, _, curr = heapq.heappop(frontier)
+        if closed[curr]:  # stale entry
+            continue
+        closed[curr] = 1
+        if trace:
+            order.append((side, curr))
+
+        x, y = divmod(curr, cols)
+        g = g_buf[curr] + 1
+        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
+            nx, ny = x + dx, y + dy
+            if nx < 0 or ny < 0 or nx >= rows or ny >= cols:
+                continue
+            cell = nx * cols + ny
+            if walls[cell] == 1 or closed[cell] or g >= g_buf[cell]:
+                continue
+            g_buf[cell] = g
+            state.parent[cell] = curr
+            if other.g[cell] != UNSEEN and g + other.g[cell] < best:  # the two searches meet here
+                best, meet = g + other.g[cell], cell
+
+            probe.x, probe.y = nx, ny
+            heapq.heappush(frontier, (g + H(target_node, probe), -g, cell))
+
+    forward, backward = sides[0][0], sides[1][0]
+    visited = [sides[side][0].node(cell) for side, cell in order]
+    if meet == -1:
+        return -1, ([], visited)
+
+    path = forward.path(meet) + backward.path(meet)[::-1][1:]
+    return len(path), (path, visited)
+
+
+BUCKETS = 257  # ring size of the bucket queue: the largest step cost (255) + 1 + 1 for the heuristic
+
+
+def dial(maze, start, goal, H=h2, trace=True):
+    """
+    A* over a bucket queue (Dial's algorithm)
+
+    With integer step costs (see `step_cost`) and a consistent heuristic rounded down to an integer, f never
+    decreases and a new node's f is at most `max step cost + 1` above the current one, so the frontier is a
+    ring of `BUCKETS` lists indexed by f instead of a heap: pushes and pops are O(1).
+
+    Parameters and return value are the same as for `astar`.
+    """
+
+    rows, cols, walls = flat_grid(maze)
+    state = SearchState(rows, cols)
+    g_buf, parent, closed, order = state.g, state.parent, state.closed, state.order
+
+    goal_node = Node(*goal)
+    probe = Node(0, 0)
+    goal = -1
+    if 0 <= goal_node.x < rows and 0 <= goal_node.y < cols:
+        goal = goal_node.x * cols + goal_node.y
+
+    start = start[0] * cols + start[1]
+    g_buf[start] = 0
+    probe.x, probe.y = divmod(start, cols)
+    f_min = int(H(goal_node, probe))  # f of the bucket being emptied
+    buckets = [[] for _ in range(BUCKETS)]
+    buckets[f_min % BUCKETS].append(start)
+    size = 1
+
+    while size:
+        bucket = buckets[f_min % BUCKETS]
+        while not bucket:  # move on to the next non-empty bucket
+            f_min += 1
+            bucket = buckets[f_min % BUCKETS]
+        curr = bucket.pop()  # LIFO inside a bucket: the deeper node first
+        size -= 1
+        if closed[curr]:  # stale entry
+            continue
+        closed[curr] = 1
+        if trace:
+            order.append(curr)
+
+        if curr == goal:
+            path = state.path(curr)
+            return len(path), (path, Trace(state))
+
+        x, y = divmod(curr, cols)
+        g_curr = g_buf[curr]
+        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
+            nx, ny = x + dx, y + dy
+            if nx < 0 or ny < 0 or nx >= rows or ny >= cols:
                 continue
-            if next_node.x < 0 or next_node.y < 0 or next_node.x >= len(maze) or next_node.y >= len(
-                    maze[0]):  # skip if out of borders
+            cell = nx * cols + ny
+            cost = walls[cell]
+            if cost == 1 or closed[cell]:
                 continue
-            if maze[next_node.x][next_node.y] == 1:  # skip if a wall
+            g = g_curr + (cost or 1)
+            if g >= g_buf[cell]:
                 continue
+            g_buf[cell] = g
+            parent[cell] = curr
 
-            if any((entry.x, entry.y) == (next_node.x, next_node.y) for entry in frontier): # skip if already in the frontier
-                continue 
+            probe.x, probe.y = nx, ny
+            f = max(g + int(H(goal_node, probe)), f_min)  # an inconsistent H can not push f below the current bucket
+            if f - f_min >= BUCKETS:
+                raise ValueError("heuristic grows by more than 1 per step, use `search` instead")
+            buckets[f % BUCKETS].append(cell)
+            size += 1
 
-            next_node.parent = curr_node
-            next_node.g = curr_node.g + 1
-            next_node.h = H(goal_node, next_node)
-            
-            heapq.heappush(frontier, next_node)
+    return -1, ([], Trace(state))
 
-    return -1, ([], visited)  # if no goal found
 
+def ara(maze, start, goal, H=h2, epsilon=3.0, decrease=0.5, budget=1.0):
+    """
+    Anytime Repairing A* (ARA*)
+
+    Weighted A* (f = g + epsilon * h) quickly finds a first path that costs at most `epsilon` times the optimal one.
+    Then epsilon is lowered by `decrease` and the search is repaired instead of restarted: nodes whose g improved
+    after they were expanded are kept aside and reopened for the next round. Stops when the path is proven
+    optimal or `budget` seconds have passed (the first path is always found).
 
-def vizualize(viz):
+    Yields:
+    - (number of steps, path, bound) after every round: the cheapest path so far and the proven suboptimality
+      factor of its cost; a single (-1, [], 1.0) if there is no path
+    """
+
+    deadline = time.perf_counter() + budget
+    rows, cols, walls = flat_grid(maze)
+    state = SearchState(rows, cols)
+    g_buf, parent = state.g, state.parent
+
+    goal_node = Node(*goal)
+    probe = Node(0, 0)
+    goal = -1
+    if 0 <= goal_node.x < rows and 0 <= goal_node.y < cols:
+        goal = goal_node.x * cols + goal_node.y
+
+    h_cache = {}
+
+    def h(cell):
+        if cell not in h_cache:
+            probe.x, probe.y = divmod(cell, cols)
+            h_cache[cell] = H(goal_node, probe)
+        return h_cache[cell]
+
+    start = start[0] * cols + start[1]
+    g_buf[start] = 0
+    open_set, incons = {start}, set()
+    first = True
+    best, best_cost = [], math.inf
+
+    while True:
+        closed = bytearray(rows * cols)
+        frontier = [(g_buf[c] + epsilon * h(c), -g_buf[c], c) for c in open_set]
+        heapq.heapify(frontier)
+        expanded = 0
+        while frontier:  # improve path
+            f, _, curr = frontier[0]
+            if curr not in open_set or f != g_buf[curr] + epsilon * h(curr):  # stale entry
+                heapq.heappop(frontier)
+                continue
+            if goal != -1 and g_buf[goal] != UNSEEN and g_buf[goal] + epsilon * h(goal) <= f:
+                break
+            heapq.heappop(frontier)
+            open_set.remove(curr)
+            closed[curr] = 1
+
+            expanded += 1
+            if not first and expanded % CLOCK_EVERY == 0 and time.perf_counter() > deadline:
+                return
+
+            x, y = divmod(curr, cols)
+            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
+                nx, ny = x + dx, y + dy
+                if nx < 0 or ny < 0 or nx >= rows or ny >= cols:
+                    continue
+                cell = nx * cols + ny
+                cost = walls[cell]
+                if cost == 1:
+                    continue
+                g = g_buf[curr] + (cost or 1)
+                if g >= g_buf[cell]:
+                    continue
+                g_buf[cell] = g
+                parent[cell] = curr
+                if closed[cell]:  # expanded in this round already, reopen it in the next one
+                    incons.add(cell)
+                else:
+                    open_set.add(cell)
+                    heapq.heappush(frontier, (g + epsilon * h(cell), -g, cell))
+
+        if goal == -1 or g_buf[goal] == UNSEEN:
+            yield -1, [], 1.0
+            return
+
+        # the optimal cost is at least the smallest g + h among nodes that are not settled yet
+        lower = min((g_buf[c] + h(c) for c in open_set | incons), default=g_buf[goal])
+        bound = max(1.0, min(epsilon, g_buf[goal] / lower)) if lower > 0 else 1.0
+        path = state.path(goal)
+        cost = sum(walls[x * cols + y] or 1 for x, y in path[1:])  # can be below g if parents improved meanwhile
+        if cost < best_cost:
+            best, best_cost = path, cost
+        yield len(best), best, bound
+
+        if bound <= 1.0 or time.perf_counter() > deadline:
+            return
+        first = False
+        epsilon = max(1.0, epsilon - decrease)
+        open_set |= incons
+        incons = set()
+
+
+SEARCH_MODES = {"astar": astar, "jps": jps, "bidirectional": bidirectional, "dial": dial}
+
+
+def vizualize(viz, maze=None, start=None, goal=None):
     """
     Vizualization function. Shows step by step the work of the search algorithm
 
     Parameters:
     - viz: everything required for step-by-step vizualization
+    - maze, start, goal: what the search was run on, the module level `maze`, `start_position`
+      and `finish_position` by default
     """
 
     path, visited = viz
+    maze, start, goal = _viz_defaults(maze, start, goal)
 
     fig, ax = plt.subplots()
     ax.set_xticks([])
@@ -127,7 +739,7 @@ def vizualize(viz):
     colors = ['white', 'black', 'red', 'gold', 'lightblue']
     cmap = ListedColormap(colors)  # 4 = visited (blue)
 
-    anim_maze = copy.deepcopy(maze)
+    anim_maze = (np.asarray(maze) == 1).astype(np.uint8)  # one buffer to draw on, the maze itself is left untouched
 
     # Update maze display with the new colormap
     maze_display = ax.imshow(anim_maze, cmap=cmap, vmin=0, vmax=len(colors))
@@ -136,13 +748,13 @@ def vizualize(viz):
     def update(frame):
         if frame < len(visited):
             node = visited[frame]
-            anim_maze[node.x][node.y] = 4  # Mark visited path
+            anim_maze[node.x, node.y] = 4  # Mark visited path
         else:
             for node in path:
-                anim_maze[node[0]][node[1]] = 3
+                anim_maze[node[0], node[1]] = 3
 
-        anim_maze[start_position[0]][start_position[1]] = 2
-        anim_maze[finish_position[0]][finish_position[1]] = 2
+        anim_maze[start[0], start[1]] = 2
+        anim_maze[goal[0], goal[1]] = 2
         maze_display.set_data(anim_maze)
 
     anim = animation.FuncAnimation(fig, update, frames=len(visited) + 5, interval=100)
@@ -155,6 +767,98 @@ def vizualize(viz):
     return anim
 
 
+def _viz_defaults(maze, start, goal):
+    maze = globals()["maze"] if maze is None else maze
+    start = start_position if start is None else start
+    goal = finish_position if goal is None else goal
+    return maze, start, goal
+
+
+def expansion_order(visited, shape):
+    """
+    Compact form of `visited`: a uint32 array of the maze shape with the 1-based position of every cell
+    in the expansion order, 0 for cells that were never expanded.
+    """
+    rows, cols = shape
+    if isinstance(visited, Trace):  # flat ids already, no Node objects needed
+        cells = np.frombuffer(visited.state.order, dtype=np.int32)
+    else:
+        cells = np.array([node.x * cols + node.y for node in visited], dtype=np.int64)
+    order = np.zeros(rows * cols, dtype=np.uint32)
+    order[cells] = np.arange(1, len(cells) + 1, dtype=np.uint32)
+    return order.reshape(rows, cols)
+
+
+def render(viz, maze=None, start=None, goal=None, every=None, frames=200, filename="animation.mp4", fps=10,
+           writer=None):
+    """
+    Streaming version of `vizualize` for big searches
+
+    Every frame adds the next `every` expansions (by default enough to fit the search into `frames` frames),
+    and frames go straight to the ffmpeg writer as they are drawn, so only one image is in memory at a time.
+
+    Parameters:
+    - viz: everything required for step-by-step vizualization
+    - maze, start, goal: same as for `vizualize`
+    - every: expansions per frame
+    - frames: frame budget, used when `every` is not given
+    - filename, fps: output video
+    - writer: matplotlib movie writer, `FFMpegWriter` (streams frames to ffmpeg) by default
+    """
+
+    path, visited = viz
+    maze, start, goal = _viz_defaults(maze, start, goal)
+    order = expansion_order(visited, np.shape(maze)).reshape(-1)
+    cells = np.argsort(order, kind="stable")[np.count_nonzero(order == 0):]  # cells in expansion order
+    every = every or max(1, -(-len(cells) // frames))
+
+    fig, ax = plt.subplots()
+    ax.set_xticks([])
+    ax.set_yticks([])
+    colors = ['white', 'black', 'red', 'gold', 'lightblue']
+    image = (np.asarray(maze) == 1).astype(np.uint8)
+    flat = image.reshape(-1)
+    display = ax.imshow(image, cmap=ListedColormap(colors), vmin=0, vmax=len(colors))
+
+    writer = writer or animation.FFMpegWriter(fps=fps)
+    with writer.saving(fig, filename, dpi=100):
+        for i in range(0, len(cells), every):
+            flat[cells[i:i + every]] = 4  # visited
+            image[start[0], start[1]] = image[goal[0], goal[1]] = 2
+            display.set_data(image)
+            writer.grab_frame()
+        for x, y in path:
+            image[x, y] = 3
+        image[start[0], start[1]] = image[goal[0], goal[1]] = 2
+        display.set_data(image)
+        for _ in range(fps):  # hold the final path for a second
+            writer.grab_frame()
+    plt.close(fig)
+
+
+def heatmap(viz, maze=None, start=None, goal=None, filename="expansion.png"):
+    """
+    Headless summary of a search: one PNG where expanded cells are coloured by when they were expanded
+    (dark - early, light - late), walls are black and the path is drawn on top.
+    """
+
+    path, visited = viz
+    maze, start, goal = _viz_defaults(maze, start, goal)
+    order = expansion_order(visited, np.shape(maze))
+
+    fig, ax = plt.subplots()
+    ax.set_xticks([])
+    ax.set_yticks([])
+    ax.imshow(np.asarray(maze) == 1, cmap=ListedColormap(['white', 'black']))
+    ax.imshow(np.ma.masked_equal(order, 0), cmap="viridis", interpolation="nearest")
+    if path:
+        xs, ys = zip(*path)
+        ax.plot(ys, xs, color="red", linewidth=1)  # imshow: rows are y on the plot
+    ax.plot([start[1], goal[1]], [start[0], goal[0]], "o", color="red", markersize=4)
+    fig.savefig(filename, dpi=150, bbox_inches="tight")
+    plt.close(fig)
+
+
 # Example usage:
 # maze = [
 #     [0, 1, 0, 0, 0, 1, 0, 0, 0, 0],
@@ -209,18 +913,19 @@ maze = [
 start_position = (0, 0)
 finish_position = (29, 29)
 
-num_steps, viz = astar(maze, start_position,
-                       finish_position)  # heuristics function can be added as a 4th argument; default h1
+if __name__ == "__main__":
+    num_steps, viz = astar(maze, start_position,
+                           finish_position)  # heuristics function can be added as a 4th argument; default h1
 
-# Print number of steps in path
-if num_steps != -1:
-    print(f"Path from {start_position} to {finish_position} using A* is {num_steps} steps.")
+    # Print number of steps in path
+    if num_steps != -1:
+        print(f"Path from {start_position} to {finish_position} using A* is {num_steps} steps.")
 
-else:
-    print(f"No path from {start_position} to {finish_position} exists.")
+    else:
+        print(f"No path from {start_position} to {finish_position} exists.")
 
-# Vizualize algorithm step-by-step even if the path was not found
-vizualize(viz)
+    # Vizualize algorithm step-by-step even if the path was not found
+    vizualize(viz)
 
 
 #---------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,159 @@
+import hashlib
+import os
+from array import array
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from lab1_cg106_g18_v3_Melnyk_Zacharneva import flat_grid
+
+if TYPE_CHECKING:
+    from lab1_cg106_g18_v3_Melnyk_Zacharneva import Node
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "lab1_landmarks")
+
+
+def maze_hash(maze):
+    """Hash of the maze shape and walls, used as the name of the landmark file."""
+    rows, cols, walls = flat_grid(maze)
+    digest = hashlib.sha1(f"{rows}x{cols}:".encode())
+    digest.update(bytes(walls))
+    return digest.hexdigest()
+
+
+def bfs(rows, cols, walls, source, dtype=np.uint32):
+    """Distance in moves from `source` to every cell; walls and unreachable cells get the max value of `dtype`."""
+    unreachable = np.iinfo(dtype).max
+    dist = array("i", [-1]) * (rows * cols)
+    dist[source] = 0
+    queue = array("i", [source])
+    head = 0
+    while head < len(queue):
+        curr = queue[head]
+        head += 1
+        d = dist[curr] + 1
+        x, y = divmod(curr, cols)
+        for nx, ny in [(x, y + 1), (x + 1, y), (x, y - 1), (x - 1, y)]:
+            if 0 <= nx < rows and 0 <= ny < cols:
+                cell = nx * cols + ny
+                if dist[cell] == -1 and walls[cell] != 1:
+                    dist[cell] = d
+                    queue.append(cell)
+    dist = np.frombuffer(dist, dtype=np.int32)
+    return np.where(dist < 0, unreachable, dist).astype(dtype)
+
+
+class Landmarks:
+    """
+    ALT (A*, Landmarks, Triangle inequality) heuristic.
+
+    For every landmark L the BFS distance d_L to every cell is stored, and
+    |d_L(goal) - d_L(node)| <= dist(node, goal) gives an admissible lower bound that,
+    unlike h1/h2/h3, knows about walls. The heuristic is the max over all landmarks and `h2`,
+    so it never expands more than `h2` would because of a badly placed landmark.
+    Use an instance as the `H` argument of `astar`: `astar(maze, start, goal, Landmarks.build(maze))`.
+    """
+
+    def __init__(self, tables, cols, path=None) -> None:
+        self.tables = tables  # (landmarks, rows * cols) uint16/uint32 distances
+        self.cols = cols
+        self.rows = tables.shape[1] // cols if cols else 0
+        self.path = path  # file the tables were loaded from, if any
+        self.unreachable = np.iinfo(tables.dtype).max
+        self.views = [memoryview(np.ascontiguousarray(table)) for table in tables]  # fast scalar indexing
+        self.goal, self.goal_dists = None, []
+
+    @classmethod
+    def build(cls, maze, count=8, cache_dir=CACHE_DIR, seed=18):
+        """Landmarks for `maze`, loaded from `cache_dir` if they were computed before, otherwise computed and saved."""
+        rows, cols, walls = flat_grid(maze)
+        path = os.path.join(cache_dir, f"{maze_hash(maze)}-{count}.npy") if cache_dir else None
+        if path and os.path.exists(path):
+            return cls.load(path, cols)
+
+        tables = select_landmarks(rows, cols, walls, count, seed)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, tables)
+            os.replace(tmp, path)  # atomic, other processes never see half a file
+            return cls.load(path, cols)
+        return cls(tables, cols)
+
+    @classmethod
+    def load(cls, path, cols):
+        return cls(np.load(path, mmap_mode="r"), cols, path)
+
+    def __reduce__(self):  # send the file name to worker processes, not the tables
+        if self.path is None:
+            return Landmarks, (np.asarray(self.tables), self.cols)
+        return Landmarks.load, (self.path, self.cols)
+
+    def __call__(self, goal: "Node", node: "Node"):
+        if (goal.x, goal.y) != self.goal:  # goal distances are looked up once per goal
+            self.goal, self.goal_dists = (goal.x, goal.y), []
+            if 0 <= goal.x < self.rows and 0 <= goal.y < self.cols:  # a goal outside the maze only gets h2
+                cell = goal.x * self.cols + goal.y
+                self.goal_dists = [(view, view[cell]) for view in self.views if view[cell] != self.unreachable]
+
+        cell = node.x * self.cols + node.y
+        h = abs(goal.x - node.x) + abs(goal.y - node.y)  # h2
+        for view, goal_dist in self.goal_dists:
+            d = view[cell]
+            if d != self.unreachable:
+                h = max(h, abs(goal_dist - d))
+        return h
+
+
+def select_landmarks(rows, cols, walls, count, seed=18):
+    """
+    Farthest-point landmark selection: start from a random free cell, then repeatedly add the cell
+    that is farthest (in moves) from all landmarks picked so far. Returns the BFS distance tables.
+    """
+
+    free = [cell for cell in range(rows * cols) if walls[cell] != 1]
+    if not free:
+        return np.zeros((0, rows * cols), dtype=np.uint16)
+    rng = np.random.default_rng(seed)
+
+    wall = np.frombuffer(bytes(walls), dtype=np.uint8) == 1
+    tables = []
+    nearest = None  # distance from every cell to its nearest landmark
+    source = free[rng.integers(len(free))]
+    for _ in range(count):
+        table = bfs(rows, cols, walls, source)
+        tables.append(table)
+        nearest = table if nearest is None else np.minimum(nearest, table)
+        # farthest cell from all landmarks; cells of components without a landmark (max value) come first
+        candidates = nearest.astype(np.int64)
+        candidates[wall] = -1
+        if candidates.max() <= 0:
+            break
+        source = int(candidates.argmax())
+
+    tables = np.stack(tables)
+    reachable = tables[tables != np.iinfo(tables.dtype).max]
+    dtype = np.uint16 if reachable.size == 0 or reachable.max() < np.iinfo(np.uint16).max else np.uint32
+    return np.where(tables == np.iinfo(tables.dtype).max, np.iinfo(dtype).max, tables).astype(dtype)
+
+
+if __name__ == "__main__":
+    import time
+    import lab1_cg106_g18_v3_Melnyk_Zacharneva as lab1
+    from benchmark import open_maze, backtracker_maze
+
+    cases = [("lab1 maze", lab1.maze, (0, 0), (29, 29)), ("big_maze_2", lab1.big_maze_2, (12, 12), (29, 29))]
+    for size in [128, 512]:
+        cases.append((f"backtracker {size}", backtracker_maze(size), (0, 0), (size - 1, size - 1)))
+        cases.append((f"open {size}", open_maze(size, fill=0.15), (0, 0), (size - 1, size - 1)))
+
+    for name, maze, start, goal in cases:
+        t = time.perf_counter()
+        landmarks = Landmarks.build(maze)
+        build = time.perf_counter() - t
+        print(f"{name} (landmarks ready in {build:.3f}s)")
+        for h_name, H in [("h2", lab1.h2), ("ALT", landmarks)]:
+            t = time.perf_counter()
+            num_steps, path, visited = lab1.search(maze, start, goal, H, trace=True)
+            print(f"  {h_name:>4}: steps {num_steps:>6}, expanded {len(visited):>7}, time {time.perf_counter() - t:.3f}s")
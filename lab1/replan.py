@@ -0,0 +1,168 @@
+import heapq
+import math
+from array import array
+
+import numpy as np
+
+from lab1_cg106_g18_v3_Melnyk_Zacharneva import Node, h2
+
+
+class Replanner:
+    """
+    Incremental replanning with Lifelong Planning A* (LPA*).
+
+    Keeps g (cost of the current search tree) and rhs (one-step lookahead cost) for every cell. After cells
+    change, only cells whose g and rhs disagree (inconsistent) are put back on the frontier, so a repair only
+    re-expands the part of the tree that the edit actually affected. Cells may hold terrain costs like in `astar`
+    (see `step_cost`); paths cost the same as a fresh `astar` (`H` must be consistent, like h1/h2/h3).
+
+    Example:
+        planner = Replanner(maze, (0, 0), (29, 29))
+        num_steps, path, expanded = planner.plan()
+        num_steps, path, expanded = planner.update([(4, 2, 1)])  # (x, y, new value): a door closes at (4, 2)
+    """
+
+    def __init__(self, maze, start, goal, H=h2) -> None:
+        self.grid = np.array(maze, dtype=np.uint8)  # own copy, edited by `update`
+        self.rows, self.cols = self.grid.shape
+        self.walls = memoryview(self.grid.reshape(-1))
+        self.H = H
+        self.goal_node, self.probe = Node(*goal), Node(0, 0)
+
+        size = self.rows * self.cols
+        self.g = array("d", [math.inf]) * size
+        self.rhs = array("d", [math.inf]) * size
+        self.keys = {}  # cell -> its key in the frontier, entries with another key in the heap are stale
+        self.frontier = []
+
+        self.start = start[0] * self.cols + start[1]
+        self.goal = -1
+        if 0 <= goal[0] < self.rows and 0 <= goal[1] < self.cols:
+            self.goal = goal[0] * self.cols + goal[1]
+        self.rhs[self.start] = 0
+        self._push(self.start)
+
+    def key(self, cell):
+        k = min(self.g[cell], self.rhs[cell])
+        self.probe.x, self.probe.y = divmod(cell, self.cols)
+        return k + self.H(self.goal_node, self.probe), k
+
+    def _push(self, cell):
+        key = self.key(cell)
+        self.keys[cell] = key
+        heapq.heappush(self.frontier, (key, cell))
+
+    def neighbours(self, cell):
+        x, y = divmod(cell, self.cols)
+        for nx, ny in [(x, y + 1), (x + 1, y), (x, y - 1), (x - 1, y)]:  # actions (down, right, up, left)
+            if 0 <= nx < self.rows and 0 <= ny < self.cols:
+                yield nx * self.cols + ny
+
+    def update_vertex(self, cell):
+        if cell != self.start:
+            # moving into a wall is not allowed, moving out of any cell (the start may be in a wall) is
+            best = math.inf
+            cost = self.walls[cell]
+            if cost != 1:
+                cost = cost or 1  # see `step_cost`
+                for prev in self.neighbours(cell):
+                    best = min(best, self.g[prev] + cost)
+            self.rhs[cell] = best
+        if self.g[cell] != self.rhs[cell]:
+            self._push(cell)
+        else:
+            self.keys.pop(cell, None)
+
+    def _top(self):
+        while self.frontier:
+            key, cell = self.frontier[0]
+            if self.keys.get(cell) == key:
+                return key
+            heapq.heappop(self.frontier)  # stale entry
+        return (math.inf, math.inf)
+
+    def compute(self):
+        """Expand inconsistent cells until the goal is consistent and nothing cheaper is left. Returns expansions."""
+        if self.goal == -1:
+            return 0
+        expanded = 0
+        while self._top() < self.key(self.goal) or self.rhs[self.goal] != self.g[self.goal]:
+            if not self.frontier:
+                break
+            _, cell = heapq.heappop(self.frontier)
+            del self.keys[cell]
+            expanded += 1
+            if self.g[cell] > self.rhs[cell]:  # overconsistent: settle it
+                self.g[cell] = self.rhs[cell]
+                for nxt in self.neighbours(cell):
+                    self.update_vertex(nxt)
+            else:  # underconsistent: a cell got more expensive, reopen it and its successors
+                self.g[cell] = math.inf
+                self.update_vertex(cell)
+                for nxt in self.neighbours(cell):
+                    self.update_vertex(nxt)
+        return expanded
+
+    def path(self):
+        if self.goal == -1 or self.g[self.goal] == math.inf:
+            return []
+        cell, path = self.goal, []
+        while cell != self.start:  # entering a cell costs the same from every side: follow the cheapest predecessor
+            path.append(divmod(cell, self.cols))
+            cell = min(self.neighbours(cell), key=lambda prev: self.g[prev])
+        path.append(divmod(self.start, self.cols))
+        path.reverse()
+        return path
+
+    def plan(self):
+        """
+        Returns:
+        - Number of steps from start to goal, equals -1 if the path is not found
+        - Path from start to goal as a list of coordinates
+        - Number of nodes expanded by this call
+        """
+        expanded = self.compute()
+        path = self.path()
+        return (len(path) if path else -1), path, expanded
+
+    def update(self, edits):
+        """
+        Apply `edits` - a list of (x, y, value) with 0 for empty space, 1 for a wall and 2..255 for terrain -
+        and repair the path. Raises IndexError for cells outside the maze, before anything is changed.
+        """
+        for x, y, _ in edits:
+            if not (0 <= x < self.rows and 0 <= y < self.cols):  # negative indices would edit another cell
+                raise IndexError(f"cell {(x, y)} is outside the {self.rows}x{self.cols} maze")
+        for x, y, value in edits:
+            if self.grid[x, y] != value:
+                self.grid[x, y] = value
+                self.update_vertex(x * self.cols + y)  # only the cost of moving into the cell changes
+        return self.plan()
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    from lab1_cg106_g18_v3_Melnyk_Zacharneva import search
+    from benchmark import open_maze
+
+    size = 256
+    maze = open_maze(size, fill=0.2)
+    start, goal = (0, 0), (size - 1, size - 1)
+    planner = Replanner(maze, start, goal)
+    num_steps, path, expanded = planner.plan()
+    print(f"initial plan: {num_steps} steps, {expanded} expansions")
+
+    rng = random.Random(18)
+    for _ in range(10):
+        x, y = rng.choice(path[1:-1])  # block the current path so every edit forces a repair
+        maze[x][y] = 1
+        t = time.perf_counter()
+        num_steps, path, expanded = planner.update([(x, y, 1)])
+        t_repair = time.perf_counter() - t
+        t = time.perf_counter()
+        fresh, _, visited = search(maze, start, goal, h2, trace=True)
+        t_fresh = time.perf_counter() - t
+        assert num_steps == fresh
+        print(f"wall at {(x, y)}: {num_steps} steps, repair {expanded:>6} expansions in {t_repair:.3f}s | "
+              f"fresh A* {len(visited):>6} expansions in {t_fresh:.3f}s")
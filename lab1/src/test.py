@@ -1,5 +1,17 @@
+import os
+import random
+import tempfile
 import unittest
-from main import astar, Node, h1, h2, h3
+import numpy as np
+os.environ.setdefault("MPLBACKEND", "Agg") # headless: the rendering tests only write files
+from matplotlib import animation
+from main import astar, jps, ara, path_cost, expansion_order, render, heatmap, SearchStats, Node, h1, h2, h3
+from landmarks import Landmarks
+from components import Components
+from batch import batch_astar
+from hpa import HPA
+from replan import Replanner
+import benchmark
 
 big_maze = [
     [1, 0, 1, 1, 0, 0, 0, 1, 1, 1, 1, 0, 1, 1, 1, 1, 1, 1, 1, 0, 1, 1, 1, 1, 1, 0, 1, 0, 1, 1],
@@ -212,4 +224,252 @@ class TestAStart(unittest.TestCase):
       self.assertEqual(num_steps, 71)
       self.assertEqual(len(viz[1]), 182) # <- the amount of visited nodes is much higher than with heuristics
 
+# ---------------------------------------------------------------------------
+# A NumPy array (or np.memmap) maze gives the same result as a nested list.
+    def test_numpy_maze(self):
+      finish = (29, 29)
+      for h in [h1, h2, h3]:
+        num_steps, viz = astar(big_maze, start_position, finish, h)
+        num_steps_np, viz_np = astar(np.array(big_maze, dtype=np.uint8), start_position, finish, h)
+        self.assertEqual(num_steps_np, num_steps)
+        self.assertEqual(viz_np[0], viz[0])
+        self.assertEqual(len(viz_np[1]), len(viz[1]))
+
+# ---------------------------------------------------------------------------
+# Jump Point Search finds paths of the same length as A*, expanding fewer nodes.
+    def test_jps(self):
+      cases = [(small_maze, (0, 0), (6, 6)), (small_maze, (0, 0), (0, 6)), (small_maze, (0, 0), (0, 0)),
+               (big_maze, (0, 0), (29, 29)), (big_maze_2, (12, 12), (29, 29))]
+      for maze, start, finish in cases:
+        for h in [h1, h2, h3]:
+          num_steps, viz = astar(maze, start, finish, h)
+          num_steps_jps, viz_jps = jps(maze, start, finish, h)
+          self.assertEqual(num_steps_jps, num_steps)
+          self.assertEqual(len(viz_jps[0]), len(viz[0]))
+          self.assertLessEqual(len(viz_jps[1]), len(viz[1]))
+
+# ---------------------------------------------------------------------------
+# Bidirectional A* (selected with `mode`) finds paths of the same length as A*.
+    def test_bidirectional(self):
+      cases = [(small_maze, (0, 0), (6, 6)), (small_maze, (0, 0), (0, 6)), (small_maze, (0, 0), (5, 6)),
+               (small_maze, (0, 0), (10, 10)), (small_maze, (0, 0), (0, 0)),
+               (big_maze, (0, 0), (29, 29)), (big_maze_2, (12, 12), (29, 29))]
+      for maze, start, finish in cases:
+        for h in [h1, h2, h3]:
+          num_steps, viz = astar(maze, start, finish, h)
+          num_steps_bi, viz_bi = astar(maze, start, finish, h, mode="bidirectional")
+          self.assertEqual(num_steps_bi, num_steps)
+          self.assertEqual(len(viz_bi[0]), len(viz[0]))
+          if viz_bi[0]:
+            self.assertEqual((viz_bi[0][0], viz_bi[0][-1]), (start, finish))
+
+# ---------------------------------------------------------------------------
+# Landmark (ALT) heuristic knows about walls: same path length, fewer visited nodes than h2.
+    def test_landmarks(self):
+      finish = (29, 29)
+      alt = Landmarks.build(big_maze, cache_dir=None)
+      num_steps, viz = astar(big_maze, start_position, finish, h2)
+      num_steps_alt, viz_alt = astar(big_maze, start_position, finish, alt)
+      self.assertEqual(num_steps_alt, num_steps)
+      self.assertLess(len(viz_alt[1]), len(viz[1]))
+      alt = Landmarks.build(small_maze, cache_dir=None)
+      for finish in [(0, 6), (5, 6), (10, 10), (-1, 3), (3, -1), (7, 0)]: # unreachable, in a wall, outside the maze
+        num_steps, viz = astar(small_maze, start_position, finish, alt)
+        self.assertEqual(num_steps, -1)
+        self.assertEqual(len(viz[1]), len(astar(small_maze, start_position, finish, h2)[1][1]))
+
+# ---------------------------------------------------------------------------
+# With a component index unreachable, in-wall and out-of-range goals are reported without visiting anything.
+    def test_components(self):
+      index = Components(small_maze)
+      for finish in [(0, 6), (5, 6), (10, 10)]:
+        num_steps, viz = index.astar(start_position, finish, h2)
+        self.assertEqual(num_steps, -1)
+        self.assertEqual(viz, ([], []))
+      num_steps, viz = index.astar(start_position, (6, 6), h2)
+      self.assertEqual(num_steps, 17)
+      index.set_cell(6, 5, 1) # cut the only way to (6, 6)
+      self.assertEqual(index.astar(start_position, (6, 6), h2)[0], -1)
+      index.set_cell(6, 5, 0)
+      self.assertEqual(index.astar(start_position, (6, 6), h2)[0], 17)
+
+      for seed in range(200): # terrain edits mixed with walls: the index agrees with a fresh build and plain astar
+        rng = random.Random(seed)
+        maze = [[rng.choice([0, 0, 1, 3]) for _ in range(11)] for _ in range(4)]
+        index = Components(maze)
+        for _ in range(30):
+          x, y = rng.randrange(4), rng.randrange(11)
+          maze[x][y] = rng.choice([0, 1, 3])
+          index.set_cell(x, y, maze[x][y])
+        fresh = Components(maze)
+        free = [(x, y) for x in range(4) for y in range(11) if maze[x][y] != 1]
+        for start in free:
+          for finish in free:
+            self.assertEqual(index.connected(start, finish), fresh.connected(start, finish))
+        for start, finish in [rng.sample(free, 2) for _ in range(5)] if len(free) > 1 else []:
+          self.assertEqual(index.astar(start, finish, h2)[0], astar(maze, start, finish, h2)[0])
+
+# ---------------------------------------------------------------------------
+# Terrain costs (values 2..255): A* and the bucket queue (Dial) agree on the cheapest path,
+# anytime ARA* starts with a bounded suboptimal path and ends with the optimal one.
+    def test_terrain(self):
+      maze = [row[:] for row in small_maze]
+      for x in range(1, 7):
+        maze[x][4] = 9 if maze[x][4] == 0 else maze[x][4] # the corridor to (6, 6) gets expensive
+      finish = (6, 6)
+      num_steps, viz = astar(maze, start_position, finish, h2)
+      num_steps_dial, viz_dial = astar(maze, start_position, finish, h2, mode="dial")
+      cost = path_cost(maze, viz[0])
+      self.assertEqual(path_cost(maze, viz_dial[0]), cost)
+      self.assertGreater(cost, 16) # more expensive than the unit-cost path
+      solutions = list(ara(maze, start_position, finish, h2, epsilon=3.0))
+      for _, path, bound in solutions:
+        self.assertLessEqual(path_cost(maze, path), bound * cost)
+      self.assertEqual(solutions[-1][2], 1.0)
+      self.assertEqual(path_cost(maze, solutions[-1][1]), cost)
+
+# ---------------------------------------------------------------------------
+# Instrumentation: the counters add up, hooks see every push/expansion and the path,
+# and without `trace` nothing is kept for visualization.
+    def test_stats(self):
+      finish = (29, 29)
+      expanded, pushed, goals = [], [], []
+      stats = SearchStats(on_expand=lambda x, y, g: expanded.append((x, y)),
+                          on_push=lambda x, y, g, f: pushed.append((x, y)), on_goal=goals.append)
+      num_steps, viz = astar(big_maze, start_position, finish, h2, stats=stats)
+      self.assertEqual(num_steps, 71)
+      self.assertEqual(stats.expanded, len(viz[1]))
+      self.assertEqual(expanded, [(node.x, node.y) for node in viz[1]])
+      self.assertEqual(stats.pops, stats.expanded + stats.duplicates)
+      self.assertEqual(stats.pushes, len(pushed))
+      self.assertEqual(stats.heuristic_calls, stats.pushes - 1) # the start is pushed without H
+      self.assertGreater(stats.max_frontier, 1)
+      self.assertEqual(goals, [viz[0]])
+      num_steps_quiet, viz_quiet = astar(big_maze, start_position, finish, h2, trace=False)
+      self.assertEqual((num_steps_quiet, viz_quiet[0], len(viz_quiet[1])), (num_steps, viz[0], 0))
+
+# ---------------------------------------------------------------------------
+# The process pool answers every query like a serial `astar`, in input order, with a status for each.
+    def test_batch(self):
+      queries = [((0, 0), (6, 6)), ((0, 0), (0, 6)), ((0, 0), (5, 6)), ((0, 0), (10, 10)), ((0, 0), (0, 0)),
+                 ((6, 6), (0, 0))]
+      results = list(batch_astar(small_maze, queries, h2, workers=2))
+      self.assertEqual([r.index for r in results], list(range(len(queries))))
+      for result, (start, finish) in zip(results, queries):
+        num_steps, viz = astar(small_maze, start, finish, h2)
+        self.assertEqual((result.start, result.goal), (start, finish))
+        self.assertEqual(result.num_steps, num_steps)
+        self.assertEqual(result.path, viz[0])
+        self.assertEqual(result.status, "ok" if num_steps != -1 else "unreachable")
+      results = list(batch_astar(big_maze, [((0, 0), (29, 29))], h2, workers=1, max_expansions=5))
+      self.assertEqual((results[0].num_steps, results[0].status), (-1, "max_expansions"))
+      results = sorted(batch_astar(big_maze, [((0, 0), (29, 29))] * 4, h2, workers=2, ordered=False))
+      self.assertEqual([r.num_steps for r in results], [71] * 4)
+
+# ---------------------------------------------------------------------------
+# HPA*: after random edits the abstract graph equals a fresh build, every path is a valid walk over free cells
+# no cheaper than the A* one (terrain included), and a path is found exactly when A* finds one.
+# A start outside the maze has no answer in `astar`, HPA* gives -1.
+    def test_hpa(self):
+      rng = random.Random(18)
+      for _ in range(50):
+        rows, cols = rng.randint(3, 14), rng.randint(3, 14)
+        maze = [[rng.choice([0, 0, 0, 1, 1, 9]) for _ in range(cols)] for _ in range(rows)]
+        hpa = HPA(maze, cluster=rng.randint(2, 5))
+        for _ in range(15):
+          x, y = rng.randrange(rows), rng.randrange(cols)
+          maze[x][y] = rng.choice([0, 1, 3])
+          hpa.set_cell(x, y, maze[x][y])
+        fresh = HPA(maze, cluster=hpa.size)
+        self.assertEqual((hpa.borders, hpa.inter, hpa.intra), (fresh.borders, fresh.inter, fresh.intra))
+        for distances in hpa.intra.values(): # abstract edges cost what their refined paths cost
+          for node, targets in distances.items():
+            for other, cost in targets.items():
+              self.assertEqual(cost, path_cost(maze, hpa.local_path(node, other)))
+
+        cells = [(x, y) for x in range(rows) for y in range(cols)]
+        for start in rng.sample(cells, 6): # the start may be in a wall, like in `astar` it may step out of it
+          finish = (rng.randrange(-1, rows + 1), rng.randrange(-1, cols + 1)) # may be a wall or outside the maze
+          num_steps, viz = astar(maze, start, finish, h2)
+          num_steps_hpa, (path, _) = hpa.find_path(start, finish)
+          self.assertEqual(num_steps_hpa == -1, num_steps == -1)
+          if num_steps_hpa != -1:
+            self.assertEqual((path[0], path[-1], len(path)), (start, finish, num_steps_hpa))
+            self.assertGreaterEqual(path_cost(maze, path), path_cost(maze, viz[0]))
+            for (x, y), (nx, ny) in zip(path, path[1:]):
+              self.assertEqual(abs(nx - x) + abs(ny - y), 1)
+              self.assertNotEqual(maze[nx][ny], 1)
+      self.assertEqual(hpa.find_path((-1, 0), (0, 0))[0], -1)
+
+# ---------------------------------------------------------------------------
+# LPA* replanning: after every edit (walls across the current path, walls taken away again, terrain)
+# the repaired path costs the same as a fresh A* on the edited maze.
+    def test_replan(self):
+      rng = random.Random(18)
+      for _ in range(20):
+        size = rng.randint(4, 12)
+        maze = [[int(rng.random() < 0.2) for _ in range(size)] for _ in range(size)]
+        start, finish = (0, 0), (size - 1, size - 1)
+        maze[0][0] = maze[size - 1][size - 1] = 0
+        planner = Replanner(maze, start, finish)
+        num_steps, path, _ = planner.plan()
+        walls = []
+        for _ in range(25):
+          if len(path) > 2 and rng.random() < 0.5: # cut the current path
+            x, y = rng.choice(path[1:-1])
+            value = 1
+          elif walls and rng.random() < 0.5: # take an earlier wall away
+            x, y = walls.pop(rng.randrange(len(walls)))
+            value = 0
+          else:
+            x, y = rng.randrange(size), rng.randrange(size)
+            value = rng.choice([0, 1, 3, 9])
+          if value == 1:
+            walls.append((x, y))
+          maze[x][y] = value
+          num_steps, path, _ = planner.update([(x, y, value)])
+          num_steps_fresh, viz = astar(maze, start, finish, h2)
+          self.assertEqual(num_steps == -1, num_steps_fresh == -1)
+          if num_steps != -1:
+            self.assertEqual((path[0], path[-1]), (start, finish))
+            self.assertEqual(path_cost(maze, path), path_cost(maze, viz[0]))
+      for edit in [(-1, 0, 1), (0, -1, 1), (size, 0, 1), (0, size, 1)]: # nothing wraps around to another cell
+        with self.assertRaises(IndexError):
+          planner.update([(0, 1, 1), edit])
+        self.assertEqual(planner.grid[0, 1], maze[0][1])
+
+# ---------------------------------------------------------------------------
+# Headless rendering: the expansion order numbers every visited cell once, the streaming renderer
+# and the heatmap write their files.
+    def test_render(self):
+      finish = (29, 29)
+      num_steps, viz = astar(big_maze, start_position, finish, h2)
+      order = expansion_order(viz[1], (30, 30))
+      self.assertEqual(sorted(order[order > 0]), list(range(1, len(viz[1]) + 1)))
+      for node, i in zip(viz[1], range(1, 4)):
+        self.assertEqual(order[node.x, node.y], i)
+      with tempfile.TemporaryDirectory() as tmp:
+        heatmap(viz, big_maze, start_position, finish, filename=os.path.join(tmp, "expansion.png"))
+        render(viz, big_maze, start_position, finish, frames=5, fps=2, filename=os.path.join(tmp, "search.gif"),
+               writer=animation.PillowWriter(fps=2))
+        for name in ["expansion.png", "search.gif"]:
+          self.assertGreater(os.path.getsize(os.path.join(tmp, name)), 0)
+
+# ---------------------------------------------------------------------------
+# Benchmark suite: every algorithm (ALT and HPA* included) finds the only path of a perfect maze,
+# and `compare` reports worse metrics and changed path lengths but not noise below `min_time`.
+    def test_benchmark(self):
+      maze = np.array(benchmark.backtracker_maze(31), dtype=np.uint8)
+      results = {algo: benchmark.run(maze, algo, memory=False) for algo in benchmark.ALGOS}
+      self.assertIn("astar-alt", results)
+      self.assertIn("hpa", results)
+      self.assertEqual(len({r["path_length"] for r in results.values()}), 1)
+      baseline = {"a": {"time": 1.0, "build_time": 0.001, "expanded": 100, "peak_memory": None, "path_length": 9}}
+      record = {"a": {"time": 1.5, "build_time": 0.005, "expanded": 100, "peak_memory": 10, "path_length": 11}}
+      regressions = benchmark.compare(record, baseline, threshold=10)
+      self.assertEqual(len(regressions), 2)
+      self.assertTrue(regressions[0].startswith("a: path length 9 -> 11"))
+      self.assertTrue(regressions[1].startswith("a: time"))
+      self.assertEqual(benchmark.compare(baseline, baseline, threshold=10), [])
+
 unittest.main(argv=[''], verbosity=2, exit=False)
@@ -0,0 +1,68 @@
+import argparse
+import copy
+import random
+import time
+
+from lab2_cg106_g18_v3_Melnyk_Zacharneva import (State, Action, Player, TranspositionTable, Budget, get_player,
+                                                  minimax, solve, cross_check, iterative_deepening, actions)
+
+
+def deepcopy_result(state: State, action: Action) -> State:
+    """The original transition model: deep-copies the state and edits a list board in place."""
+    new_board, new_turn = copy.deepcopy(state)
+    new_board = list(new_board)
+    new_board[action.pile] -= action.sticks
+    return State(new_board, new_turn + 1)
+
+
+def count_nodes(board, depth, transition=None, **options):
+    """
+    Runs a full `minimax` from `board` (AI to move) and counts the positions it visits with a `Budget`.
+    `transition` replaces `get_result` for this search only, `options` go to `minimax`. Returns (nodes, seconds).
+    """
+    budget = Budget()
+    if transition is not None:
+        budget.get_result = transition  # `minimax` plays its moves through the budget
+    state = State(tuple(board), 0)
+    t = time.perf_counter()
+    minimax(state, float("-inf"), float("inf"), depth, get_player(state) == Player.AI, budget=budget, **options)
+    return budget.nodes, time.perf_counter() - t
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="lab2 minimax micro-benchmark")
+    parser.add_argument("--board", type=int, nargs="+", default=[3, 4, 5, 6])
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds for the iterative deepening run")
+    parser.add_argument("--solver-piles", type=int, default=500, help="piles of the random board timed for `solve`")
+    parser.add_argument("--seed", type=int, default=18)
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    checked = cross_check()
+    print(f"solver agrees with exhaustive minimax on {checked} positions ({time.perf_counter() - t:.2f}s)")
+    rng = random.Random(args.seed)
+    board = tuple(rng.randint(1, 5000) for _ in range(args.solver_piles))
+    t = time.perf_counter()
+    solve(State(board, 0))
+    print(f"  solver: {args.solver_piles} piles, {sum(board)} sticks in {(time.perf_counter() - t) * 1e6:.0f}us")
+
+    for name, transition in [("deepcopy", deepcopy_result), ("tuple", None)]:
+        nodes, seconds = count_nodes(args.board, args.depth, transition)
+        print(f"{name:>8}: {nodes} nodes in {seconds:.3f}s, {nodes / seconds:,.0f} nodes/s")
+
+    print("move generation on boards with repeated pile sizes:")
+    for board, depth in [((3, 3, 3, 3), 6), ((4, 4, 4, 4, 4), 5), ((2, 2, 3, 3, 5, 5), 5), ((5, 5, 6, 6, 7, 7), 4)]:
+        state = State(board, 0)
+        moves, distinct = len(list(actions(state))), len(list(actions(state, unique=True)))
+        nodes, seconds = count_nodes(board, depth, unique=False)
+        nodes_u, seconds_u = count_nodes(board, depth, unique=True)
+        print(f"  {list(board)} depth {depth}: root moves {moves} -> {distinct}, "
+              f"effective branching {nodes ** (1 / depth):.2f} -> {nodes_u ** (1 / depth):.2f}, "
+              f"nodes {nodes} -> {nodes_u}, {seconds:.3f}s -> {seconds_u:.3f}s ({seconds / seconds_u:.1f}x)")
+
+    for name, table in [("deepening", None), ("deepening + table", TranspositionTable())]:
+        action, value, iterations = iterative_deepening(State(tuple(args.board), 0), args.budget, table=table)
+        print(f"{name}: {action} (value {value}) after {len(iterations)} completed iterations")
+        for it in iterations:
+            print(f"  depth {it.depth:>3}: {it.nodes:>8} nodes in {it.seconds:.4f}s, best {it.action} ({it.value})")
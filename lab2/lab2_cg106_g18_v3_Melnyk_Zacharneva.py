@@ -1,9 +1,12 @@
-import copy
+import json
+import os
+import time
+from collections import OrderedDict
 from typing import TypeAlias
 from enum import Enum
 from typing import NamedTuple
 
-Board: TypeAlias = list[int]
+Board: TypeAlias = tuple[int, ...]
 
 class State(NamedTuple):
     board: Board
@@ -23,11 +26,11 @@ def get_player(state: State) -> Player:
     return Player.AI if state.turn % 2 == 0 else Player.USER
 
 def get_result(state: State, action: Action) -> State:
-    """Transition model. What is the result state of taking `action` from `state`."""
-    new_board, new_turn = copy.deepcopy(state)
-    new_board[action.pile] -= action.sticks
-    new_turn += 1
-    return State(new_board, new_turn)
+    """Transition model. What is the result state of taking `action` from `state`.
+    Boards are immutable tuples, so the new board is one O(piles) slice-and-join instead of a deep copy.
+    """
+    board, pile = tuple(state.board), action.pile
+    return State(board[:pile] + (board[pile] - action.sticks,) + board[pile + 1:], state.turn + 1)
 
 
 def is_terminal(state: State) -> bool:
@@ -51,45 +54,377 @@ def evaluate(state: State) -> int:
       return Player.AI.value
 
 
-def minimax(state: State, alpha: float, beta: float, depth: int, is_max: bool) -> tuple[Action, int]:
-    if is_terminal(state) or depth == 0:
-        return None, evaluate(state)
+class Bound(Enum):
+    EXACT = 0
+    LOWER = 1  # the search failed high: the true value is at least `value`
+    UPPER = 2  # the search failed low: the true value is at most `value`
+
+
+class Entry(NamedTuple):
+    value: int
+    bound: Bound
+    action: Action  # best action, `pile` is an index into the canonical (sorted) board
+
+
+def canonical(board: Board) -> tuple[int, ...]:
+    """Pile order does not matter in Nim: boards that are permutations of each other share one key."""
+    return tuple(sorted(board))
+
+
+class TranspositionTable:
+    """Bounded memo of searched positions for `minimax`, the least recently used entry is evicted first."""
+
+    def __init__(self, capacity: int = 1 << 20) -> None:
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key) -> Entry | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry: Entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+
+class SearchTimeout(Exception):
+    """Raised inside `minimax` when its `Budget` runs out of time."""
+
+
+class Budget:
+    """
+    Node counter and optional wall-clock deadline (`time.perf_counter()` value) shared by one `minimax` call.
+    `minimax` plays moves and evaluates positions through its budget, so a subclass can observe them.
+    """
+
+    get_result = staticmethod(get_result)
+    evaluate = staticmethod(evaluate)
+
+    def __init__(self, deadline: float | None = None) -> None:
+        self.deadline = deadline
+        self.nodes = 0
+
+    def tick(self, depth: int | None = None):
+        """Called by `minimax` on entering a node with `depth` plies left."""
+        self.nodes += 1
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout(f"out of time after {self.nodes} nodes")
+
+    def cutoff(self, depth: int):
+        """Called by `minimax` when a node with `depth` plies left is pruned."""
+
+
+class MinimaxStats(Budget):
+    """
+    `Budget` that records what one `minimax` call did: nodes and alpha-beta cutoffs per ply (0 = root), at
+    which move of a node the cutoffs came (0 = the first move tried; ordering is good when most are there)
+    and the time spent in `get_result` and `evaluate`. Used by `profile_minimax`.
+    """
+
+    def __init__(self, root_depth: int, deadline: float | None = None) -> None:
+        super().__init__(deadline)
+        self.root_depth = root_depth
+        self.nodes_per_ply = [0] * (root_depth + 1)
+        self.cutoffs_per_ply = [0] * (root_depth + 1)
+        self.cutoff_move = {}  # index of the move that caused a cutoff -> count
+        self.tried = [0] * (root_depth + 2)  # children entered so far by the open node with that many plies left
+        self.times = {"get_result": 0.0, "evaluate": 0.0}
+
+    def tick(self, depth: int | None = None):
+        super().tick(depth)
+        self.nodes_per_ply[self.root_depth - depth] += 1
+        self.tried[depth + 1] += 1
+        self.tried[depth] = 0
+
+    def cutoff(self, depth: int):
+        self.cutoffs_per_ply[self.root_depth - depth] += 1
+        move = self.tried[depth] - 1
+        self.cutoff_move[move] = self.cutoff_move.get(move, 0) + 1
+
+    def get_result(self, state: State, action: Action) -> State:
+        t = time.perf_counter()
+        result = get_result(state, action)
+        self.times["get_result"] += time.perf_counter() - t
+        return result
+
+    def evaluate(self, state: State) -> int:
+        t = time.perf_counter()
+        value = evaluate(state)
+        self.times["evaluate"] += time.perf_counter() - t
+        return value
+
+    def record(self) -> dict:
+        """Plain (JSON-ready) summary of the search."""
+        return {
+            "depth": self.root_depth,
+            "nodes": self.nodes,
+            "nodes_per_ply": self.nodes_per_ply,
+            "cutoffs_per_ply": self.cutoffs_per_ply,
+            "cutoff_move": {str(move): count for move, count in sorted(self.cutoff_move.items())},
+            "effective_branching": self.nodes ** (1 / self.root_depth) if self.root_depth else 0.0,
+            "get_result_time": self.times["get_result"],
+            "evaluate_time": self.times["evaluate"],
+        }
+
+
+def actions(state: State, first: Action | None = None, unique: bool = False):
+    """
+    Legal moves from `state` without the losing grab of the last stick, ordered for alpha-beta:
+    `first` (e.g. the best move of a previous search), then the moves to nim-sum 0, then the rest.
+    With `unique`, piles of equal size are only moved from once: their moves lead to the same boards
+    up to pile order, so only one move per distinct resulting multiset of pile sizes is yielded.
+    """
+    board = state.board
+    total = sum(board)
+    nim_sum = 0
+    for pile in board:
+        nim_sum ^= pile
+
+    front = [first] if first is not None else []
+    front += [Action(i, pile - (pile ^ nim_sum)) for i, pile in enumerate(board) if pile ^ nim_sum < pile]
+    seen = set()  # (pile size, sticks) with `unique`, the action itself otherwise
+    for a in front:
+        key = (board[a.pile], a.sticks) if unique else a
+        if a.sticks != total and key not in seen:
+            seen.add(key)
+            yield a
+    sizes = set()
+    for i, sticks in enumerate(board):
+        if unique:
+            if sticks in sizes:
+                continue
+            sizes.add(sticks)
+        for j in range(1, sticks + 1):
+            a = Action(i, j)
+            if j != total and ((sticks, j) if unique else a) not in seen:  # taking the last stick loses, skip it
+                yield a
+
+
+def to_board_action(board: Board, key: tuple[int, ...], action: Action) -> Action:
+    """Map an action on the canonical board `key` back to a pile of `board` with the same size."""
+    return Action(board.index(key[action.pile]), action.sticks)
+
+
+def minimax(state: State, alpha: float, beta: float, depth: int, is_max: bool,
+            table: TranspositionTable | None = None, budget: Budget | None = None,
+            first: Action | None = None, tablebase=None, unique: bool = True) -> tuple[Action, int]:
+    """
+    Depth-limited minimax with alpha-beta pruning. With a `table`, positions are looked up by
+    (canonical board, player to move, depth) before they are searched and stored after.
+    A `budget` counts the nodes and raises `SearchTimeout` past its deadline, `first` is tried before other moves;
+    with a budget, moves are played and positions evaluated through it (see `MinimaxStats`).
+    Positions covered by a `tablebase` (see tablebase.py) get their exact value without any search.
+    `unique` skips moves that only differ by which of several equal piles they take from (see `actions`).
+    """
+    play, score = (get_result, evaluate) if budget is None else (budget.get_result, budget.evaluate)
+    if budget is not None:
+        budget.tick(depth)
+    if is_terminal(state):
+        return None, score(state)
+    if tablebase is not None:
+        hit = tablebase.probe(state.board)
+        if hit is not None:
+            action, wins = hit
+            mover = get_player(state).value
+            return action, (mover if wins else -mover)
+    if depth == 0:
+        return None, score(state)
+
+    if table is not None:
+        alpha_orig, beta_orig = alpha, beta
+        key = (canonical(state.board), get_player(state), depth)
+        entry = table.get(key)
+        if entry is not None:
+            if entry.bound == Bound.LOWER:
+                alpha = max(alpha, entry.value)
+            elif entry.bound == Bound.UPPER:
+                beta = min(beta, entry.value)
+            if entry.bound == Bound.EXACT or alpha >= beta:
+                return to_board_action(state.board, key[0], entry.action), entry.value
+            first = first or to_board_action(state.board, key[0], entry.action)
 
     action = None  # best action
     value = float("-inf") if is_max else float("inf")
 
-    for i, sticks in enumerate(state.board):
-        for j in range(1, sticks + 1):
-          a = Action(i, j)
-          if (sum(get_result(state, a).board)) == 0:
-            continue
-          _, v = minimax(get_result(state, a), alpha, beta, depth - 1, (not is_max))
-          # Maximizing player
-          if is_max:
-            if v > value:
-              value = v
-              action = a
-            if value >= beta:
-              break
-            alpha = max(alpha, value)
-          # Minimizing player
-          else:
-            if v < value:
-              value = v
-              action = a
-            if value <= alpha:
-              break
-            beta = min(beta, value)
+    for a in actions(state, first, unique):
+        _, v = minimax(play(state, a), alpha, beta, depth - 1, (not is_max), table, budget,
+                       tablebase=tablebase, unique=unique)
+        # Maximizing player
+        if is_max:
+          if v > value:
+            value = v
+            action = a
+          if value >= beta:
+            if budget is not None:
+              budget.cutoff(depth)
+            break
+          alpha = max(alpha, value)
+        # Minimizing player
+        else:
+          if v < value:
+            value = v
+            action = a
+          if value <= alpha:
+            if budget is not None:
+              budget.cutoff(depth)
+            break
+          beta = min(beta, value)
+
+    if table is not None and action is not None:
+        if value <= alpha_orig:
+            bound = Bound.UPPER
+        elif value >= beta_orig:
+            bound = Bound.LOWER
+        else:
+            bound = Bound.EXACT
+        sizes = key[0]
+        table.put(key, Entry(value, bound, Action(sizes.index(state.board[action.pile]), action.sticks)))
     return action, value
 
 
+def profile_minimax(state: State, depth: int, table: TranspositionTable | None = None,
+                    tablebase=None) -> tuple[Action, int, dict]:
+    """
+    `minimax` from `state` for the player to move with full statistics. Returns the action, the value and a
+    per-move record (see `MinimaxStats.record`) with the total time and, with a `table`, its hits and misses.
+    The timers live in the `MinimaxStats` passed to this call only, so profiles may run side by side.
+    """
+    stats = MinimaxStats(depth)
+    hits, misses = (table.hits, table.misses) if table is not None else (0, 0)
+    t = time.perf_counter()
+    action, value = minimax(state, float("-inf"), float("inf"), depth, get_player(state) == Player.AI,
+                            table, stats, tablebase=tablebase)
+    seconds = time.perf_counter() - t
+
+    record = {"board": list(state.board), "turn": state.turn, "action": list(action) if action else None,
+              "value": value, "seconds": seconds, **stats.record()}
+    if table is not None:
+        record["table_hits"], record["table_misses"] = table.hits - hits, table.misses - misses
+    return action, value, record
+
+
+class Iteration(NamedTuple):
+    depth: int
+    action: Action
+    value: int
+    nodes: int
+    seconds: float
+
+
+def iterative_deepening(state: State, budget: float = 1.0, max_depth: int | None = None,
+                        table: TranspositionTable | None = None) -> tuple[Action, int, list[Iteration]]:
+    """
+    Search depth 1, 2, ... until `budget` seconds run out or `max_depth` (by default the number of sticks,
+    deep enough to reach the end of the game) is done. Each iteration tries the best move of the previous one first.
+    Returns the best action and value of the deepest completed iteration and a record of every completed iteration.
+    """
+    deadline = time.perf_counter() + budget
+    is_max = get_player(state) == Player.AI
+    if max_depth is None:
+        max_depth = sum(state.board)
+
+    action, value = next(actions(state), None), evaluate(state)  # fallback if not even depth 1 completes
+    iterations = []
+    for depth in range(1, max_depth + 1):
+        counter = Budget(deadline)
+        t = time.perf_counter()
+        try:
+            best, v = minimax(state, float("-inf"), float("inf"), depth, is_max, table, counter, first=action)
+        except SearchTimeout:
+            break
+        action, value = best, v
+        iterations.append(Iteration(depth, action, value, counter.nodes, time.perf_counter() - t))
+    return action, value, iterations
+
+
+def solve(state: State) -> tuple[Action, int]:
+    """
+    Optimal misère Nim move straight from the nim-sum, O(piles) for any board size. Same result shape as `minimax`:
+    the action (None at terminal states) and the exact game value, +1 if AI wins and -1 if User wins.
+
+    While at least two piles have 2+ sticks, play as in normal Nim: move to nim-sum 0.
+    With exactly one such pile, shrink it to 0 or 1 stick so that an odd number of 1-piles is left.
+    With piles of at most 1 stick, the player to move wins iff the number of 1-piles is even.
+    """
+    board = state.board
+    ones = sum(1 for pile in board if pile == 1)
+    big = [i for i, pile in enumerate(board) if pile > 1]
+
+    action = None
+    if not big:
+        wins = ones % 2 == 0
+        if ones > 1:
+            action = Action(board.index(1), 1)
+    elif len(big) == 1:
+        wins = True
+        i = big[0]
+        action = Action(i, board[i] - (ones + 1) % 2)  # leave 0 sticks if the 1-piles are odd, else 1
+    else:
+        nim_sum = 0
+        for pile in board:
+            nim_sum ^= pile
+        wins = nim_sum != 0
+        if wins:
+            i = next(i for i, pile in enumerate(board) if pile ^ nim_sum < pile)
+            action = Action(i, board[i] - (board[i] ^ nim_sum))
+
+    if action is None and sum(board) > 1:  # lost anyway: take one stick from the largest pile
+        action = Action(board.index(max(board)), 1)
+
+    mover = get_player(state)
+    return action, (mover.value if wins else -mover.value)
+
+
+def cross_check(max_piles: int = 3, max_sticks: int = 5):
+    """
+    Compare `solve` with exhaustive `minimax` (deep enough to reach terminal states only) on every board
+    of up to `max_piles` piles of up to `max_sticks` sticks: same value, and the solver's move keeps it.
+    Returns the number of positions checked, raises AssertionError on the first disagreement.
+    """
+    checked = 0
+    table = TranspositionTable()
+    boards = [()]
+    for _ in range(max_piles):
+        boards = [board + (pile,) for board in boards for pile in range(max_sticks + 1)]
+        for board in boards:
+            if is_terminal(State(board, 0)):
+                continue
+            for turn in (0, 1):
+                state = State(board, turn)
+                depth, is_max = sum(board), get_player(state) == Player.AI
+                _, value = minimax(state, float("-inf"), float("inf"), depth, is_max, table)
+                action, solved = solve(state)
+                assert solved == value, f"{state}: solver says {solved}, minimax {value}"
+                child = get_result(state, action)
+                _, after = minimax(child, float("-inf"), float("inf"), depth, not is_max, table)
+                assert after == value, f"{state}: solver move {action} gives {after}, expected {value}"
+                checked += 1
+    return checked
+
+
 # AI - max player: aims to maximize utility of the state
 # User - min player: aims to minimize utility of the state
 
 
 def print_board(board):
     """Visualize the board with stick emojis."""
-    print(board)
+    print(list(board))
 
 
 def init_game() -> State:
@@ -114,7 +449,7 @@ def init_game() -> State:
 
     print("Example Action: to remove 3 sticks from pile 2, enter: 2 3. Piles are counted from 0.")
 
-    return State(board, 1)  # initial state (board, turn); user always starts first
+    return State(tuple(board), 1)  # initial state (board, turn); user always starts first
 
 
 def end_game(state: State):
@@ -129,12 +464,40 @@ def end_game(state: State):
 if __name__ == "__main__":
     state = init_game()
     DEPTH = 5
+    TIME_BUDGET = 1.0  # seconds per move for "deepening" and "mcts"
+    TABLEBASE = "nim.tb"  # built by tablebase.py, used when it exists
+    STATS_LOG = None  # e.g. "minimax_stats.jsonl": log a search record for every "minimax" move
+    ENGINE = "minimax"  # "minimax" - depth-limited search, "deepening" - as deep as TIME_BUDGET allows,
+                        # "mcts" - Monte Carlo tree search, "solver" - closed form, instant on any board
+    table = TranspositionTable()  # kept between moves, positions repeat across the game
+    tablebase = None
+    if os.path.exists(TABLEBASE):
+        from tablebase import Tablebase
+        tablebase = Tablebase(TABLEBASE)
+    from mcts import MCTS
+    tree = MCTS()  # one tree for the whole game, reused between moves
+    def profiled(state):
+        action, _, record = profile_minimax(state, DEPTH, table, tablebase)
+        with open(STATS_LOG, "a") as log:
+            log.write(json.dumps(record) + "\n")
+        return action
+
+    engines = {
+        "minimax": lambda state: minimax(state, float("-inf"), float("inf"), DEPTH, True, table,
+                                         tablebase=tablebase)[0],
+        "deepening": lambda state: iterative_deepening(state, TIME_BUDGET, table=table)[0],
+        "mcts": lambda state: tree.search(state, budget=TIME_BUDGET)[0],
+        "solver": lambda state: solve(state)[0],
+    }
+    if STATS_LOG:
+        engines["minimax"] = profiled
     while not is_terminal(state):
         print_board(state.board)
 
         match get_player(state):
             case Player.AI:
-                action, _ = minimax(state, float("-inf"), float("inf"), DEPTH, True)
+                hit = tablebase.probe(state.board) if tablebase is not None else None
+                action = hit[0] if hit is not None else engines[ENGINE](state)  # known positions need no search
                 print(f"AI removes {action.sticks} stick(s) from pile {action.pile}")
 
             case Player.USER:
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import random
+import time
+
+from selfplay import percentile
+
+
+async def play_session(host, port, rng, piles, size, latencies):
+    """One game against the server with random (legal) user moves. Returns the winner, or None on errors."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        board = [rng.randint(1, size) for _ in range(piles)]
+        writer.write(f"NEW {' '.join(map(str, board))}\n".encode())
+        await writer.drain()
+        reply = json.loads(await reader.readline())
+        while "error" not in reply and not reply.get("winner"):
+            board = reply["board"]
+            pile = rng.choice([i for i, sticks in enumerate(board) if sticks])
+            sticks = rng.randint(1, board[pile])
+            if sticks == sum(board) and sticks > 1:
+                sticks -= 1  # do not hand the game over on purpose
+            t = time.perf_counter()
+            writer.write(f"MOVE {pile} {sticks}\n".encode())
+            await writer.drain()
+            reply = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - t)
+            if reply.get("error") == "busy":
+                reply = {"board": board}  # retry with a fresh move
+        writer.write(b"QUIT\n")
+        await writer.drain()
+        return reply.get("winner")
+    finally:
+        writer.close()
+
+
+async def load(host, port, sessions, concurrency, piles, size, seed):
+    """Play `sessions` games with at most `concurrency` open at once. Returns a report dict."""
+    rng = random.Random(seed)
+    latencies, winners = [], []
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with limit:
+            try:
+                winners.append(await play_session(host, port, random.Random(rng.random()), piles, size, latencies))
+            except (ConnectionError, json.JSONDecodeError):
+                winners.append(None)
+
+    t = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(sessions)))
+    wall = time.perf_counter() - t
+    return {
+        "sessions": sessions, "concurrency": concurrency, "wall_time": wall,
+        "sessions_per_second": sessions / wall, "moves": len(latencies),
+        "latency_p50": percentile(latencies, 0.50), "latency_p99": percentile(latencies, 0.99),
+        "ai_wins": winners.count("AI"), "user_wins": winners.count("USER"), "failed": winners.count(None),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="load generator for server.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--piles", type=int, default=4)
+    parser.add_argument("--size", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=18)
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(load(args.host, args.port, args.sessions, args.concurrency, args.piles, args.size, args.seed))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(f"{report['sessions']} sessions ({report['concurrency']} at a time) in {report['wall_time']:.2f}s: "
+          f"{report['sessions_per_second']:.1f} sessions/s, {report['moves']} moves, "
+          f"latency p50 {report['latency_p50'] * 1e3:.1f}ms p99 {report['latency_p99'] * 1e3:.1f}ms, "
+          f"AI won {report['ai_wins']}, failed {report['failed']}")
@@ -0,0 +1,198 @@
+import math
+import random
+import time
+from array import array
+from collections import Counter
+
+from lab2_cg106_g18_v3_Melnyk_Zacharneva import (State, Action, Player, get_player, get_result, is_terminal, evaluate,
+                                                  actions, canonical)
+
+
+class MCTS:
+    """
+    Monte Carlo Tree Search (UCT) for Nim.
+
+    Nodes live in a pool of flat arrays indexed by node id: parent, the move that leads to the node (pile size
+    and sticks, so it stays valid whatever the pile order), the first child and number of children (children of
+    a node are allocated next to each other), visits and wins. Wins are counted for the player who made the move
+    into the node. States are not stored, they are replayed from the root while descending.
+    Between moves the tree is kept: a new search starts from the node of the current position if it is the
+    position searched last, the one after the move the search returned, or one move after that.
+
+    Example:
+        engine = MCTS(seed=18)
+        action, win_rate = engine.search(state, budget=1.0)  # or iterations=5000
+    """
+
+    def __init__(self, c: float = 1.4, seed=None, capacity: int = 1 << 21) -> None:
+        self.c = c
+        self.rng = random.Random(seed)
+        self.capacity = capacity  # nodes, the tree is dropped when a new search starts above it
+        self.iterations = 0  # iterations run by the last search
+        self.reset()
+
+    def reset(self):
+        self.parent = array("i")
+        self.size = array("i")
+        self.sticks = array("i")
+        self.first = array("i")  # -1 until the node is expanded
+        self.count = array("i")
+        self.visits = array("i")
+        self.wins = array("d")
+        self.root = self._new(-1, 0, 0)
+        self.state = None  # position at the root
+        self.chosen = None  # node of the move the last search returned
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def _new(self, parent, size, sticks):
+        for column, value in [(self.parent, parent), (self.size, size), (self.sticks, sticks), (self.first, -1),
+                              (self.count, 0), (self.visits, 0), (self.wins, 0.0)]:
+            column.append(value)
+        return len(self.parent) - 1
+
+    def _children(self, node):
+        return range(self.first[node], self.first[node] + self.count[node])
+
+    def _play(self, state: State, node) -> State:
+        return get_result(state, Action(state.board.index(self.size[node]), self.sticks[node]))
+
+    def _reroot(self, state: State):
+        """
+        Make the node of `state` the root: the old root, the node of the move the last search returned, or its
+        child for the opponent's reply. The reply is read off the boards, so this costs one scan of the children.
+        """
+        if self.state is not None and len(self) < self.capacity:
+            key = (canonical(state.board), state.turn % 2)
+            if (canonical(self.state.board), self.state.turn % 2) == key:
+                self.state = state
+                return
+            if self.chosen is not None:
+                node, s = self.chosen, self._play(self.state, self.chosen)
+                if (canonical(s.board), s.turn % 2) == key:
+                    self.root, self.state, self.chosen = node, state, None
+                    return
+                reply = move_between(s.board, state.board)
+                if reply is not None and (s.turn + 1) % 2 == state.turn % 2:
+                    for child in self._children(node):
+                        if (self.size[child], self.sticks[child]) == reply:
+                            self.root, self.state, self.chosen = child, state, None
+                            return
+        self.reset()
+        self.state = state
+
+    def _expand(self, node, state: State):
+        moves = [(state.board[a.pile], a.sticks) for a in actions(state, unique=True)]
+        k = len(moves)
+        self.first[node], self.count[node] = len(self), k
+        self.parent.extend(array("i", [node]) * k)  # whole columns at once, big boards have thousands of moves
+        self.size.extend(size for size, _ in moves)
+        self.sticks.extend(sticks for _, sticks in moves)
+        self.first.extend(array("i", [-1]) * k)
+        self.count.extend(array("i", [0]) * k)
+        self.visits.extend(array("i", [0]) * k)
+        self.wins.extend(array("d", [0.0]) * k)
+
+    def _select(self, node):
+        """Child with the best upper confidence bound, unvisited children first."""
+        log_n = math.log(self.visits[node])
+        best, best_score = -1, -math.inf
+        for child in self._children(node):
+            visits = self.visits[child]
+            if visits == 0:
+                return child
+            score = self.wins[child] / visits + self.c * math.sqrt(log_n / visits)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def _rollout(self, state: State) -> Player:
+        """Random playout (never taking the last stick while others are left). Returns the winner."""
+        board, turn = list(state.board), state.turn
+        total = sum(board)
+        piles = [i for i, sticks in enumerate(board) if sticks]
+        rng = self.rng
+        while total > 1:
+            i = piles[rng.randrange(len(piles))]
+            take = rng.randint(1, board[i])
+            if take == total:
+                take -= 1
+            board[i] -= take
+            total -= take
+            turn += 1
+            if board[i] == 0:
+                piles.remove(i)
+        loser = get_player(State(board, turn))  # has to take the last stick
+        return Player.USER if loser == Player.AI else Player.AI
+
+    def search(self, state: State, iterations: int | None = None, budget: float | None = None) -> tuple[Action, float]:
+        """
+        Run `iterations` playouts or as many as fit in `budget` seconds (both may be given, 1000 playouts if neither),
+        but at least one, so the root always has its moves. Finding the root in the kept tree counts against
+        `budget`. Returns the most visited move and its win rate for the player to move.
+        """
+        if is_terminal(state):
+            return None, evaluate(state)
+        if iterations is None and budget is None:
+            iterations = 1000
+        deadline = time.perf_counter() + budget if budget is not None else None
+        self._reroot(state)
+
+        done = 0
+        while done == 0 or ((iterations is None or done < iterations)
+                            and (deadline is None or time.perf_counter() < deadline)):
+            node, s = self.root, self.state
+            path = [(node, None)]  # (node, player who moved into it)
+            while self.count[node]:  # selection
+                mover = get_player(s)
+                node = self._select(node)
+                s = self._play(s, node)
+                path.append((node, mover))
+            if self.first[node] == -1 and not is_terminal(s):  # expansion
+                self._expand(node, s)
+                mover = get_player(s)
+                node = self.first[node]
+                s = self._play(s, node)
+                path.append((node, mover))
+            winner = self._rollout(s)
+            for node, mover in path:  # backpropagation
+                self.visits[node] += 1
+                if mover == winner:
+                    self.wins[node] += 1
+            done += 1
+        self.iterations = done
+
+        if not self.count[self.root]:  # cannot happen for a position with moves, but never fail to answer
+            return next(actions(state)), 0.0
+        best = max(self._children(self.root), key=lambda child: self.visits[child])
+        self.chosen = best
+        return (Action(state.board.index(self.size[best]), self.sticks[best]),
+                self.wins[best] / max(self.visits[best], 1))
+
+
+def move_between(before: tuple, after: tuple):
+    """The single move (pile size, sticks) that turns board `before` into `after` up to pile order, or None."""
+    diff = Counter(before)
+    diff.subtract(after)
+    changed = {size: count for size, count in diff.items() if count}
+    if sorted(changed.values()) != [-1, 1]:
+        return None
+    old, new = sorted(changed, key=changed.get, reverse=True)
+    return (old, old - new) if old > new else None
+
+
+if __name__ == "__main__":
+    from lab2_cg106_g18_v3_Melnyk_Zacharneva import solve
+
+    rng = random.Random(18)
+    for piles, size in [(4, 8), (8, 30), (40, 200)]:
+        board = tuple(rng.randint(1, size) for _ in range(piles))
+        engine = MCTS(seed=18)
+        t = time.perf_counter()
+        action, win_rate = engine.search(State(board, 0), budget=1.0)
+        elapsed = time.perf_counter() - t
+        _, value = solve(State(board, 0))
+        _, after = solve(get_result(State(board, 0), action))
+        print(f"{piles} piles up to {size}: {action}, win rate {win_rate:.2f} after {engine.iterations} playouts "
+              f"in {elapsed:.2f}s, {len(engine)} nodes | position value {value}, optimal move: {after == value}")
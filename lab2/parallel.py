@@ -0,0 +1,135 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import Value
+
+from lab2_cg106_g18_v3_Melnyk_Zacharneva import (State, Player, TranspositionTable, Budget, SearchTimeout,
+                                                  get_player, get_result, is_terminal, evaluate, actions, minimax)
+
+POLL_EVERY = 256  # nodes between two looks at the shared bound
+
+
+# worker side
+_bound = None  # the root's best value so far, shared by all workers
+_table = None  # per-worker transposition table, kept between searches
+
+
+def _attach(bound, table_size):
+    """Pool initializer: keep the shared bound and make the worker's own transposition table."""
+    global _bound, _table
+    _bound = bound
+    _table = TranspositionTable(table_size) if table_size else None
+
+
+class _SharedCutoff(Budget):
+    """Stops a root child search once another worker has found a move the child cannot beat."""
+
+    def __init__(self, is_max) -> None:
+        super().__init__()
+        self.best = Player.AI.value if is_max else Player.USER.value  # best value the root can get
+
+    def tick(self, depth=None):
+        self.nodes += 1
+        if self.nodes % POLL_EVERY == 0 and _bound.value == self.best:
+            raise SearchTimeout("the root already has its best possible value")
+
+
+def _search_child(board, turn, action, depth, is_max):
+    """Search one root move with the window narrowed by the shared bound. Returns (action, value or None, nodes)."""
+    bound = _bound.value
+    best = Player.AI.value if is_max else Player.USER.value
+    if bound == best:  # nothing left to win here
+        return action, None, 0
+    alpha, beta = (bound, float("inf")) if is_max else (float("-inf"), bound)
+    budget = _SharedCutoff(is_max)
+    try:
+        _, value = minimax(get_result(State(board, turn), action), alpha, beta, depth - 1, not is_max, _table, budget)
+    except SearchTimeout:
+        return action, None, budget.nodes
+    with _bound.get_lock():
+        if (is_max and value > _bound.value) or (not is_max and value < _bound.value):
+            _bound.value = value
+    return action, value, budget.nodes
+
+
+# client side
+class ParallelSearch:
+    """
+    Root-split parallel `minimax` over a process pool (young brothers wait).
+
+    The first (best-ordered) root move is searched alone to get a bound, then the other root moves are spread
+    over the workers. The root's best value so far lives in shared memory: every child search starts with its
+    alpha-beta window narrowed by it and gives up once the root already has the best value the game allows.
+    The value equals serial `minimax` with a full window; the move is one that reaches it.
+
+    Example:
+        with ParallelSearch(workers=4) as search:
+            action, value = search.minimax(state, depth=7)
+    """
+
+    def __init__(self, workers=None, table_size=1 << 18) -> None:
+        self.workers = workers or os.cpu_count()
+        self.table_size = table_size
+        self.bound = Value("d", 0.0)
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_attach, initargs=(self.bound, table_size))
+        self.nodes = 0  # nodes searched by the workers in the last call
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    def minimax(self, state: State, depth: int):
+        """Best (action, value) for the player to move at `state`, searched `depth` plies deep."""
+        if is_terminal(state) or depth == 0:
+            return None, evaluate(state)
+        is_max = get_player(state) == Player.AI
+        moves = list(actions(state, unique=True))  # one root move per distinct child board
+        board, turn = tuple(state.board), state.turn
+
+        self.bound.value = float("-inf") if is_max else float("inf")
+        first = self.pool.submit(_search_child, board, turn, moves[0], depth, is_max)
+        best_action, best_value, self.nodes = first.result()  # the eldest brother sets the bound
+
+        futures = [self.pool.submit(_search_child, board, turn, a, depth, is_max) for a in moves[1:]]
+        for future in as_completed(futures):
+            action, value, nodes = future.result()
+            self.nodes += nodes
+            if value is not None and ((is_max and value > best_value) or (not is_max and value < best_value)):
+                best_action, best_value = action, value
+        return best_action, best_value
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="parallel root-split minimax vs serial minimax")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, os.cpu_count()])
+    args = parser.parse_args()
+
+    cases = [((3, 4, 5, 6), 10), ((1, 2, 3, 4, 5, 6, 7), 8), ((2, 3, 5, 7, 11, 13), 8)]  # seconds of serial search
+    for board, depth in cases:
+        state = State(board, 0)
+        t = time.perf_counter()
+        action, value = minimax(state, float("-inf"), float("inf"), depth, True)
+        full = time.perf_counter() - t
+        # the workers stop once the root has the best value the game allows, give serial search the same window
+        t = time.perf_counter()
+        action, value_win = minimax(state, Player.USER.value, Player.AI.value, depth, True)
+        serial = time.perf_counter() - t
+        assert value_win == value
+        print(f"{list(board)} depth {depth}: serial {action} value {value} in {serial:.2f}s "
+              f"({full:.2f}s with a full window)")
+        for workers in sorted(set(args.workers)):
+            with ParallelSearch(workers, table_size=0) as search:  # no tables, serial runs without one too
+                search.minimax(State((2, 2), 0), 1)  # start the workers before timing
+                t = time.perf_counter()
+                p_action, p_value = search.minimax(state, depth)
+                elapsed = time.perf_counter() - t
+            assert p_value == value, f"parallel value {p_value} != serial {value}"
+            print(f"  {workers:>2} workers: {p_action} value {p_value} in {elapsed:.2f}s, "
+                  f"speedup {serial / elapsed:.2f}x, {search.nodes} nodes")
@@ -0,0 +1,139 @@
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from lab2_cg106_g18_v3_Melnyk_Zacharneva import (State, Player, Budget, get_player, get_result, is_terminal, evaluate,
+                                                  actions, minimax, iterative_deepening, solve)
+from mcts import MCTS
+
+
+# players: a factory gets the text after ":" in the player spec (may be empty) and a seed, and returns
+# a function state -> (action, nodes searched for it)
+def random_player(arg, seed):
+    rng = random.Random(seed)
+    return lambda state: (rng.choice(list(actions(state))), 0)
+
+
+def minimax_player(arg, seed):
+    depth = int(arg or 5)
+
+    def move(state):
+        budget = Budget()
+        action, _ = minimax(state, float("-inf"), float("inf"), depth, get_player(state) == Player.AI, budget=budget)
+        return action, budget.nodes
+    return move
+
+
+def deepening_player(arg, seed):
+    seconds = float(arg or 0.1)
+
+    def move(state):
+        action, _, iterations = iterative_deepening(state, seconds)
+        return action, sum(it.nodes for it in iterations)
+    return move
+
+
+def mcts_player(arg, seed):
+    iterations = int(arg or 1000)
+    tree = MCTS(seed=seed)
+
+    def move(state):
+        action, _ = tree.search(state, iterations=iterations)
+        return action, tree.iterations
+    return move
+
+
+def solver_player(arg, seed):
+    return lambda state: (solve(state)[0], 0)
+
+
+PLAYERS = {"random": random_player, "minimax": minimax_player, "deepening": deepening_player,
+           "mcts": mcts_player, "solver": solver_player}
+
+
+def make_player(spec, seed):
+    """Player from a spec like "minimax:5" (depth), "deepening:0.1" (seconds), "mcts:1000" (playouts) or "random"."""
+    name, _, arg = spec.partition(":")
+    if name not in PLAYERS:
+        raise ValueError(f"unknown player {name!r}, expected one of {list(PLAYERS)}")
+    return PLAYERS[name](arg, seed)
+
+
+def random_board(rng, piles, size):
+    while True:
+        board = tuple(rng.randint(0, size) for _ in range(piles))
+        if sum(board) > 1:
+            return board
+
+
+def play_game(index, specs, seed, piles, size):
+    """
+    One seeded game between the two player specs. The players swap who moves first every game.
+    Returns the winner (0 or 1) and, per player, the latency (seconds) and nodes of every move.
+    """
+    rng = random.Random(seed * 1_000_003 + index)
+    players = [make_player(spec, rng.randrange(2 ** 32)) for spec in specs]
+    state = State(random_board(rng, piles, size), index % 2)  # turn 0: player 0 (AI seat) moves first
+    latency, nodes = [[], []], [[], []]
+    while not is_terminal(state):
+        side = 0 if get_player(state) == Player.AI else 1
+        t = time.perf_counter()
+        action, searched = players[side](state)
+        latency[side].append(time.perf_counter() - t)
+        nodes[side].append(searched)
+        state = get_result(state, action)
+    winner = 0 if evaluate(state) == Player.AI.value else 1
+    return winner, latency, nodes
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+
+def summarize(specs, results, wall):
+    """Per-player moves/s, nodes per move, p50/p99 move latency and win rate over all `results`."""
+    report = {"games": len(results), "wall_time": wall, "players": {}}
+    for side, spec in enumerate(specs):
+        latency = [t for _, lat, _ in results for t in lat[side]]
+        nodes = [n for _, _, nod in results for n in nod[side]]
+        report["players"][f"{side}:{spec}"] = {
+            "wins": sum(1 for winner, _, _ in results if winner == side) / len(results),
+            "moves": len(latency),
+            "moves_per_second": len(latency) / sum(latency) if sum(latency) else None,
+            "nodes_per_move": sum(nodes) / len(nodes) if nodes else 0,
+            "latency_p50": percentile(latency, 0.50),
+            "latency_p99": percentile(latency, 0.99),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="headless lab2 self-play")
+    parser.add_argument("players", nargs=2, metavar="PLAYER", help=f"one of {list(PLAYERS)}, e.g. minimax:3 random")
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--piles", type=int, default=4)
+    parser.add_argument("--size", type=int, default=6, help="largest starting pile")
+    parser.add_argument("--seed", type=int, default=18)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default="selfplay.json")
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    with ProcessPoolExecutor(args.workers) as pool:
+        results = list(pool.map(play_game, range(args.games), [args.players] * args.games, [args.seed] * args.games,
+                                [args.piles] * args.games, [args.size] * args.games, chunksize=32))
+    report = summarize(args.players, results, time.perf_counter() - t)
+    report["config"] = vars(args)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"{report['games']} games in {report['wall_time']:.1f}s")
+    for name, r in report["players"].items():
+        print(f"{name:>16}: wins {r['wins']:.1%}, {r['moves_per_second']:,.0f} moves/s, "
+              f"{r['nodes_per_move']:.0f} nodes/move, p50 {r['latency_p50'] * 1e3:.2f}ms, "
+              f"p99 {r['latency_p99'] * 1e3:.2f}ms")
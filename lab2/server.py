@@ -0,0 +1,176 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from lab2_cg106_g18_v3_Melnyk_Zacharneva import (State, Action, Player, TranspositionTable, get_result, is_terminal,
+                                                  evaluate, actions, iterative_deepening)
+
+GRACE = 1.0  # seconds a worker may overrun its move budget before the server stops waiting for it
+
+
+# worker side
+_table = None
+
+
+def _init_worker():
+    global _table
+    _table = TranspositionTable(1 << 18)  # per worker, shared by all sessions it serves
+
+
+def _search(board, turn, depth, budget):
+    action, _, _ = iterative_deepening(State(board, turn), budget, max_depth=depth, table=_table)
+    return action
+
+
+# server side
+class Busy(Exception):
+    """The server has too many searches waiting, the client should retry later."""
+
+
+class NimServer:
+    """
+    Asyncio Nim server, one game per TCP connection, one command per line, one JSON reply per line:
+
+        NEW 3 4 5     -> {"board": [3, 4, 5]}                   the user moves first, like in the game loop
+        MOVE 0 1      -> {"board": [...], "ai": [pile, sticks], "winner": null | "AI" | "USER", "timeout": false}
+        QUIT
+
+    AI moves run as `iterative_deepening` (up to `depth`, `move_timeout` seconds) in a process pool, so a long
+    search never blocks other sessions. A search that overruns by more than `GRACE` seconds is answered with the
+    first ordered move, but its worker stays taken until it ends. Backpressure: at most `workers` searches run at
+    a time, at most `max_queue` more wait for a worker (others get {"error": "busy"}), at most `max_sessions`
+    connections are served. A command is only read after the previous reply was written, so a slow client only
+    slows itself.
+    """
+
+    def __init__(self, workers=None, depth=5, move_timeout=1.0, max_sessions=1000, max_queue=256) -> None:
+        self.workers = workers or os.cpu_count()
+        self.depth, self.move_timeout = depth, move_timeout
+        self.max_sessions, self.max_queue = max_sessions, max_queue
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_init_worker)
+        self.slots = asyncio.Semaphore(self.workers)
+        self.sessions = 0
+        self.waiting = 0
+        self.timeouts = 0
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    async def ai_move(self, state: State) -> tuple[Action, bool]:
+        """Best move from a worker, or the first ordered move if the worker overran. Returns (action, timed out)."""
+        if self.slots.locked() and self.waiting >= self.max_queue:  # only searches that must wait count
+            raise Busy()
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            future = asyncio.get_running_loop().run_in_executor(
+                self.pool, _search, state.board, state.turn, self.depth, self.move_timeout)
+        except BaseException:
+            self.slots.release()
+            raise
+        # a running worker cannot be interrupted: the slot is only given back when its search really ends,
+        # so overrunning searches never push the number of busy workers past the cap
+        future.add_done_callback(self._search_done)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.move_timeout + GRACE), False
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return next(actions(state)), True
+
+    def _search_done(self, future: asyncio.Future):
+        self.slots.release()
+        if not future.cancelled():
+            future.exception()  # an overrun search's error is not awaited by anyone, do not log it as lost
+
+    async def command(self, state: State | None, line: str) -> tuple[State | None, dict]:
+        words = line.split()
+        if not words:
+            return state, {"error": "empty command"}
+        name, args = words[0].upper(), words[1:]
+        try:
+            numbers = [int(word) for word in args]
+        except ValueError:
+            return state, {"error": "arguments must be integers"}
+
+        if name == "NEW":
+            if not numbers or any(pile < 0 for pile in numbers) or sum(numbers) <= 1:
+                return state, {"error": "NEW needs pile sizes with more than one stick in total"}
+            state = State(tuple(numbers), 1)  # user always starts first
+            return state, {"board": list(state.board)}
+
+        if name == "MOVE":
+            if state is None:
+                return state, {"error": "no game, send NEW first"}
+            if len(numbers) != 2:
+                return state, {"error": "MOVE needs a pile and a number of sticks"}
+            action = Action(*numbers)
+            if not (0 <= action.pile < len(state.board) and 0 < action.sticks <= state.board[action.pile]):
+                return state, {"error": "illegal move"}
+            before, state = state, get_result(state, action)
+            reply = {"board": list(state.board), "ai": None, "winner": None, "timeout": False}
+            if not is_terminal(state):
+                try:
+                    action, reply["timeout"] = await self.ai_move(state)
+                except Busy:
+                    return before, {"error": "busy"}  # the user move is not applied, the client may send it again
+                state = get_result(state, action)
+                reply["board"], reply["ai"] = list(state.board), list(action)
+            if is_terminal(state):
+                reply["winner"] = "AI" if evaluate(state) == Player.AI.value else "USER"
+            return state, reply
+
+        return state, {"error": f"unknown command {name}"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self.sessions >= self.max_sessions:
+            writer.write(b'{"error": "busy"}\n')
+            await writer.drain()
+            writer.close()
+            return
+        self.sessions += 1
+        state = None
+        try:
+            while line := await reader.readline():
+                text = line.decode(errors="replace").strip()
+                if text.upper() == "QUIT":
+                    break
+                state, reply = await self.command(state, text)
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="lab2 Nim game server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--move-timeout", type=float, default=1.0, help="seconds of search per AI move")
+    parser.add_argument("--max-sessions", type=int, default=1000)
+    parser.add_argument("--max-queue", type=int, default=256, help="searches allowed to wait for a worker")
+    args = parser.parse_args()
+
+    async def main():
+        server = NimServer(args.workers, args.depth, args.move_timeout, args.max_sessions, args.max_queue)
+        try:
+            await server.serve(args.host, args.port)
+        finally:
+            server.close()
+
+    asyncio.run(main())
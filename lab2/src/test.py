@@ -0,0 +1,295 @@
+import asyncio
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+from functools import reduce
+from math import comb
+from operator import xor
+import lab2_cg106_g18_v3_Melnyk_Zacharneva as nim
+from lab2_cg106_g18_v3_Melnyk_Zacharneva import (State, Player, TranspositionTable, Budget, get_player, get_result,
+                                                  is_terminal, evaluate, actions, minimax, profile_minimax, solve,
+                                                  cross_check, iterative_deepening)
+from tablebase import Tablebase, boards, rank
+from mcts import MCTS
+from parallel import ParallelSearch
+from server import NimServer, Busy, GRACE
+from selfplay import play_game, random_board, summarize
+from benchmark import count_nodes, deepcopy_result
+
+
+class TestNim(unittest.TestCase):
+# ---------------------------------------------------------------------------
+# The closed-form solver agrees with exhaustive minimax on every small board, for both players to move.
+    def test_cross_check(self):
+      checked = cross_check(max_piles=3, max_sticks=5)
+      self.assertGreater(checked, 400)
+
+# ---------------------------------------------------------------------------
+# On bigger boards too the solver's value is the exhaustive minimax value.
+    def test_solver(self):
+      for board in [(3, 4, 5), (1, 1, 1), (1, 1), (2, 2), (7,), (1, 2, 3, 4)]:
+        state = State(board, 0)
+        _, value = minimax(state, float("-inf"), float("inf"), sum(board), True)
+        self.assertEqual(solve(state)[1], value)
+
+# ---------------------------------------------------------------------------
+# `rank` numbers the sorted boards of a tablebase 0, 1, 2, ... in the order `boards` yields them.
+    def test_rank(self):
+      for piles, size in [(1, 5), (3, 4), (4, 6)]:
+        ranks = [rank(board) for board in boards(piles, size)]
+        self.assertEqual(ranks, list(range(comb(size + piles, piles))))
+
+# ---------------------------------------------------------------------------
+# A tablebase written to disk and opened again gives the solver's value on every board it covers,
+# in any pile order and with empty piles, its best move keeps that value, and bigger boards are not covered.
+    def test_tablebase(self):
+      with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "nim.tb")
+        Tablebase.build(3, 6, path)
+        tablebase = Tablebase(path)
+        self.assertEqual(len(tablebase), comb(6 + 3, 3))
+        for sizes in boards(3, 6):
+          for board in [sizes, tuple(reversed(sizes)) + (0,)]:
+            if sum(board) <= 1:
+              continue
+            for turn in (0, 1):
+              state = State(board, turn)
+              action, wins = tablebase.probe(board)
+              _, value = solve(state)
+              self.assertEqual(wins, value == get_player(state).value)
+              self.assertTrue(0 < action.sticks <= board[action.pile])
+              if wins: # the winning move keeps the value
+                child = get_result(state, action)
+                self.assertEqual(evaluate(child) if is_terminal(child) else solve(child)[1], value)
+        self.assertIsNone(tablebase.probe((1, 1, 1, 1)))
+        self.assertIsNone(tablebase.probe((7, 1)))
+        del tablebase
+
+# ---------------------------------------------------------------------------
+# MCTS always answers with a legal move, even when no time is left for a single playout.
+    def test_mcts_no_budget(self):
+      for options in [{"iterations": 0}, {"budget": 0.0}, {"budget": 1e-9}]:
+        action, _ = MCTS(seed=18).search(State((3, 4, 5), 0), **options)
+        self.assertTrue(0 < action.sticks <= (3, 4, 5)[action.pile])
+
+# ---------------------------------------------------------------------------
+# Between moves the tree is kept: after the AI move and the user's reply the search goes on from the
+# reply's node with its playouts, and positions the tree does not know start a new tree.
+    def test_mcts_reroot(self):
+      engine = MCTS(seed=18)
+      state = State((3, 4, 5, 6), 0)
+      action, _ = engine.search(state, iterations=3000)
+      state = get_result(state, action)
+      node = engine.chosen
+      reply = max(engine._children(node), key=lambda child: engine.visits[child]) # the reply the tree knows best
+      visits = engine.visits[reply]
+      state = get_result(state, next(a for a in actions(state) if (state.board[a.pile], a.sticks) ==
+                                     (engine.size[reply], engine.sticks[reply])))
+      engine.search(state, iterations=100)
+      self.assertEqual(engine.root, reply)
+      self.assertEqual(engine.visits[reply], visits + 100)
+      engine.search(State((2, 2, 9), 0), iterations=10)
+      self.assertEqual(engine.root, 0)
+
+# ---------------------------------------------------------------------------
+# Game loop with the "mcts" engine on a big board: every AI move is legal and in budget, also after
+# the tree has been reused (it used to crash on the second move).
+    def test_mcts_game_loop(self):
+      rng = random.Random(18)
+      state = State(tuple(rng.randint(1, 200) for _ in range(40)), 1)
+      tree = MCTS(seed=18)
+      for _ in range(3):
+        state = get_result(state, rng.choice(list(actions(state)))) # user
+        t = time.perf_counter()
+        action = tree.search(state, budget=0.2)[0] # AI, as in the game loop
+        self.assertLess(time.perf_counter() - t, 1.0)
+        self.assertTrue(0 < action.sticks <= state.board[action.pile])
+        state = get_result(state, action)
+
+# ---------------------------------------------------------------------------
+# Profiling: the record counts the same nodes as a plain budget, times the transition model and the evaluation
+# through its own stats object (module functions stay untouched), and profiles running side by side agree.
+    def test_profile(self):
+      state = State((3, 4, 5, 6), 0)
+      budget = Budget()
+      expected = minimax(state, float("-inf"), float("inf"), 5, True, budget=budget)
+      functions = nim.get_result, nim.evaluate
+      action, value, record = profile_minimax(state, 5)
+      self.assertEqual((action, value), expected)
+      self.assertEqual(record["nodes"], budget.nodes)
+      self.assertEqual(sum(record["nodes_per_ply"]), budget.nodes)
+      self.assertGreater(record["get_result_time"], 0)
+      self.assertGreater(record["evaluate_time"], 0)
+      self.assertEqual((nim.get_result, nim.evaluate), functions)
+
+      records = []
+      threads = [threading.Thread(target=lambda: records.append(profile_minimax(state, 5)[2])) for _ in range(4)]
+      for thread in threads:
+        thread.start()
+      for thread in threads:
+        thread.join()
+      self.assertEqual([r["nodes_per_ply"] for r in records], [record["nodes_per_ply"]] * 4)
+      self.assertEqual((nim.get_result, nim.evaluate), functions)
+
+# ---------------------------------------------------------------------------
+# A transposition table never changes the value of a full-window search: with a fresh table, with one table
+# shared by all searches and with a table so small that it evicts all the time.
+    def test_table(self):
+      rng = random.Random(18)
+      shared = TranspositionTable()
+      for _ in range(60):
+        state = State(tuple(rng.randint(0, 5) for _ in range(rng.randint(2, 4))), rng.randint(0, 1))
+        if sum(state.board) <= 1:
+          continue
+        depth = rng.randint(1, sum(state.board))
+        is_max = get_player(state) == Player.AI
+        _, value = minimax(state, float("-inf"), float("inf"), depth, is_max)
+        for table in [TranspositionTable(), shared, TranspositionTable(capacity=4)]:
+          self.assertEqual(minimax(state, float("-inf"), float("inf"), depth, is_max, table)[1], value)
+          self.assertLessEqual(len(table), table.capacity)
+      self.assertGreater(shared.hits, 0)
+
+# ---------------------------------------------------------------------------
+# Skipping moves from equal piles keeps the value, and the move a table hands back (mapped from the sorted
+# board by `to_board_action`) is legal on the board as it was given, in any pile order.
+    def test_unique(self):
+      rng = random.Random(18)
+      for _ in range(40):
+        sizes = [rng.randint(1, 3) for _ in range(rng.randint(1, 2))]
+        board = sizes + [rng.choice(sizes) for _ in range(rng.randint(1, 2))]  # at least one repeated size
+        rng.shuffle(board)
+        state = State(tuple(board), rng.randint(0, 1))
+        depth = rng.randint(1, min(sum(board), 6))
+        is_max = get_player(state) == Player.AI
+        _, value = minimax(state, float("-inf"), float("inf"), depth, is_max, unique=False)
+        table = TranspositionTable()
+        for _ in range(2):  # the second search is answered from the table
+          action, v = minimax(state, float("-inf"), float("inf"), depth, is_max, table, unique=True)
+          self.assertEqual(v, value)
+          self.assertTrue(0 < action.sticks <= board[action.pile])
+          self.assertNotEqual(action.sticks, sum(board))
+
+# ---------------------------------------------------------------------------
+# Move ordering: `first`, then the moves to nim-sum 0, then the rest, every legal move exactly once.
+    def test_actions_first(self):
+      rng = random.Random(18)
+      for _ in range(50):
+        state = State(tuple(rng.randint(0, 7) for _ in range(rng.randint(2, 5))), 0)
+        if sum(state.board) <= 1:
+          continue
+        moves = list(actions(state))
+        first = rng.choice(moves)
+        ordered = list(actions(state, first))
+        self.assertEqual(ordered[0], first)
+        self.assertEqual(len(ordered), len(set(ordered)))
+        self.assertEqual(set(ordered), set(moves))
+        winning = [a for a in moves if a != first and reduce(xor, state.board) ^ state.board[a.pile] ^
+                   (state.board[a.pile] - a.sticks) == 0]
+        self.assertEqual(ordered[1:1 + len(winning)], winning)
+
+# ---------------------------------------------------------------------------
+# Out of time, iterative deepening answers with the deepest completed iteration (or a legal move if none completed).
+    def test_deepening_budget(self):
+      state = State((3, 4, 5, 6, 7), 0)
+      for budget in [0.0, 0.005, 0.05]:
+        action, value, iterations = iterative_deepening(state, budget)
+        self.assertTrue(0 < action.sticks <= state.board[action.pile])
+        self.assertEqual([it.depth for it in iterations], list(range(1, len(iterations) + 1)))
+        if iterations:
+          self.assertEqual((action, value), iterations[-1][1:3])
+
+# ---------------------------------------------------------------------------
+# With time to spare, iterative deepening stops at `max_depth` with the value of `minimax` at that depth.
+    def test_deepening_depth(self):
+      for board, depth in [((3, 4, 5), 4), ((1, 2, 3, 4), 5), ((2, 2), 4), ((7,), 3)]:
+        state = State(board, 1)
+        action, value, iterations = iterative_deepening(state, 60.0, max_depth=depth)
+        self.assertEqual([it.depth for it in iterations], list(range(1, depth + 1)))
+        self.assertEqual(value, minimax(state, float("-inf"), float("inf"), depth, False)[1])
+        self.assertTrue(0 < action.sticks <= board[action.pile])
+
+# ---------------------------------------------------------------------------
+# Root-split parallel search has the serial value, and its move reaches that value.
+    def test_parallel(self):
+      with ParallelSearch(workers=2, table_size=1 << 10) as search:
+        for board, turn, depth in [((3, 4, 5), 0, 5), ((1, 2, 3, 4), 1, 6), ((2, 2, 3), 0, 7), ((1, 1, 4), 1, 3)]:
+          state = State(board, turn)
+          is_max = get_player(state) == Player.AI
+          action, value = search.minimax(state, depth)
+          self.assertEqual(value, minimax(state, float("-inf"), float("inf"), depth, is_max)[1])
+          child = get_result(state, action)
+          reached = (evaluate(child) if is_terminal(child) else
+                     minimax(child, float("-inf"), float("inf"), depth - 1, not is_max)[1])
+          self.assertEqual(reached, value)
+
+# ---------------------------------------------------------------------------
+# Server backpressure: a search that overruns is answered with the first ordered move but keeps its worker's slot
+# until it really ends; meanwhile moves beyond `max_queue` waiting ones are refused as busy (and not applied),
+# and once the slot is back the server searches again.
+    def test_server(self):
+      async def run(max_queue):
+        server = NimServer(workers=1, depth=3, move_timeout=0.05, max_queue=max_queue)
+        try:
+          state = State((3, 4, 5), 0)
+          server.pool.submit(time.sleep, GRACE + 0.5) # keep the only worker busy past the grace period
+          action, timed_out = await server.ai_move(state)
+          self.assertTrue(timed_out)
+          self.assertEqual(action, next(actions(state)))
+          self.assertTrue(server.slots.locked())
+
+          waiting = [asyncio.create_task(server.ai_move(state)) for _ in range(max_queue)]
+          await asyncio.sleep(0)
+          with self.assertRaises(Busy):
+            await server.ai_move(state)
+          game = State((3, 4, 5), 1)
+          self.assertEqual(await server.command(game, "MOVE 0 1"), (game, {"error": "busy"}))
+
+          async def released():
+            while server.slots.locked():
+              await asyncio.sleep(0.01)
+          await asyncio.wait_for(asyncio.gather(released(), *waiting), 10)
+          for action, timed_out in [task.result() for task in waiting] + [await server.ai_move(state)]:
+            self.assertFalse(timed_out)
+            self.assertTrue(0 < action.sticks <= state.board[action.pile])
+          self.assertEqual(server.timeouts, 1)
+        finally:
+          server.close()
+
+      for max_queue in (0, 1):
+        asyncio.run(run(max_queue))
+
+# ---------------------------------------------------------------------------
+# Self-play: the solver wins every game it starts from a won position, and the summary accounts for every game.
+    def test_selfplay(self):
+      specs = ["solver", "random"]
+      for seed in range(5):
+        results = [play_game(index, specs, seed, 3, 4) for index in range(2)]
+        for index, (winner, latency, nodes) in enumerate(results):
+          rng = random.Random(seed * 1_000_003 + index) # the start position, drawn as `play_game` does
+          rng.randrange(2 ** 32), rng.randrange(2 ** 32)
+          start = State(random_board(rng, 3, 4), index % 2)
+          if solve(start)[1] == Player.AI.value: # seat 0 is the AI
+            self.assertEqual(winner, 0)
+          self.assertEqual([len(n) for n in nodes], [len(t) for t in latency])
+        report = summarize(specs, results, 0.0)
+        self.assertEqual(report["games"], 2)
+        players = report["players"].values()
+        self.assertAlmostEqual(sum(r["wins"] for r in players) * report["games"], 2)
+        self.assertEqual(sum(r["moves"] for r in players), sum(len(t) for _, lat, _ in results for t in lat))
+
+# ---------------------------------------------------------------------------
+# The benchmark counts nodes through a budget: the same count as `minimax` with a plain budget, with either
+# transition model, and the module functions stay untouched.
+    def test_count_nodes(self):
+      state = State((3, 4, 5, 6), 0)
+      budget = Budget()
+      minimax(state, float("-inf"), float("inf"), 5, True, budget=budget)
+      functions = nim.minimax, nim.get_result
+      self.assertEqual(count_nodes(state.board, 5)[0], budget.nodes)
+      self.assertEqual(count_nodes(state.board, 5, deepcopy_result)[0], budget.nodes)
+      self.assertEqual((nim.minimax, nim.get_result), functions)
+
+unittest.main(argv=[''], verbosity=2, exit=False)
@@ -0,0 +1,129 @@
+import os
+import struct
+from math import comb
+
+import numpy as np
+
+from lab2_cg106_g18_v3_Melnyk_Zacharneva import State, Action, is_terminal, evaluate
+
+MAGIC = b"NIMT"
+HEADER = struct.Struct("<4sBB2x")  # magic, piles, max pile size; rows of (wins, pile size, sticks) follow
+
+
+def rank(sizes) -> int:
+    """
+    Position of a sorted tuple of pile sizes among all sorted tuples of the same length (combinatorial
+    number system): a1 <= a2 <= ... maps to the strictly increasing a1 + 0 < a2 + 1 < ...
+    """
+    return sum(comb(a + i, i + 1) for i, a in enumerate(sizes))
+
+
+def boards(piles, size):
+    """All sorted tuples of `piles` pile sizes in 0..`size`, in rank order."""
+    if piles == 0:
+        yield ()
+        return
+    for last in range(size + 1):  # the largest pile has the highest weight in `rank`
+        for rest in boards(piles - 1, last):
+            yield rest + (last,)
+
+
+def retrograde(piles, size):
+    """
+    Win/loss and best move for the player to move on every board of up to `piles` piles of up to `size`
+    sticks. Boards are solved in order of their total, so every child is solved before its parent.
+    Terminal boards follow `is_terminal`/`evaluate`; other boards may not take the last stick, as in `minimax`.
+    Returns a (positions, 3) uint8 array of rows (wins, size of the pile to take from, sticks), indexed by `rank`.
+    """
+    table = np.zeros((comb(size + piles, piles), 3), dtype=np.uint8)
+    for board in sorted(boards(piles, size), key=sum):
+        row = table[rank(board)]
+        if is_terminal(State(board, 0)):
+            row[0] = evaluate(State(board, 0)) == 1  # the player to move at turn 0 is the AI
+            continue
+        total, best, fallback = sum(board), None, None
+        for i, a in enumerate(board):
+            if i and board[i - 1] == a:  # same size as the previous pile, same children
+                continue
+            for b in range(a):
+                if total == a - b:  # taking the last stick loses, never consider it
+                    continue
+                if not table[rank(tuple(sorted(board[:i] + (b,) + board[i + 1:]))), 0]:  # the opponent loses there
+                    best = (a, a - b)
+                    break
+                fallback = fallback or (a, a - b)
+            if best:
+                break
+        row[:] = (1, *best) if best else (0, *fallback)
+    return table
+
+
+class Tablebase:
+    """
+    Precomputed endgame table of Nim, memory-mapped from a file written by `Tablebase.build`.
+    Covers every board with at most `piles` non-empty piles of at most `size` sticks.
+
+    Example:
+        Tablebase.build(5, 15, "nim.tb")
+        tablebase = Tablebase("nim.tb")
+        action, value = minimax(state, float("-inf"), float("inf"), DEPTH, True, tablebase=tablebase)
+    """
+
+    def __init__(self, path) -> None:
+        with open(path, "rb") as f:
+            magic, self.piles, self.size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Nim tablebase")
+        self.path = path
+        self.rows = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER.size,
+                              shape=(comb(self.size + self.piles, self.piles), 3))
+
+    @classmethod
+    def build(cls, piles, size, path):
+        if size > 255:
+            raise ValueError("pile sizes must fit in a byte")
+        table = retrograde(piles, size)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, piles, size))
+            f.write(table.tobytes())
+        os.replace(tmp, path)  # atomic, a game never opens half a file
+        return cls(path)
+
+    def __reduce__(self):  # send the file name to worker processes, not the table
+        return Tablebase, (self.path,)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def probe(self, board) -> tuple[Action, bool] | None:
+        """(best action on `board`, does the player to move win), or None if the board is not in the table."""
+        sizes = sorted(pile for pile in board if pile)
+        if len(sizes) > self.piles or (sizes and sizes[-1] > self.size):
+            return None
+        wins, pile, sticks = self.rows[rank([0] * (self.piles - len(sizes)) + sizes)]
+        action = Action(list(board).index(pile), int(sticks)) if sticks else None
+        return action, bool(wins)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from lab2_cg106_g18_v3_Melnyk_Zacharneva import solve
+
+    parser = argparse.ArgumentParser(description="build the Nim endgame tablebase")
+    parser.add_argument("--piles", type=int, default=5)
+    parser.add_argument("--size", type=int, default=15)
+    parser.add_argument("--output", default="nim.tb")
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    tablebase = Tablebase.build(args.piles, args.size, args.output)
+    print(f"{len(tablebase)} positions in {os.path.getsize(args.output)} bytes, built in {time.perf_counter() - t:.2f}s")
+
+    for board in boards(args.piles, args.size):  # the closed-form solver must agree on every position
+        if sum(board) > 1:
+            action, wins = tablebase.probe(board)
+            _, value = solve(State(board, 0))
+            assert wins == (value == 1), f"{board}: tablebase says {wins}, solver {value}"
+    print("agrees with the closed-form solver")